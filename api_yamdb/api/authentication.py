@@ -0,0 +1,132 @@
+"""JWT аутентификация без запроса пользователя к базе.
+
+Роль и флаги пользователя приходят в claims токена (см. tokens.py).
+Проверенные токены держатся в ограниченном LRU процесса, поэтому
+повторный запрос с тем же токеном не проверяет подпись заново. Отзыв
+работает через версию токенов пользователя: claim ``ver`` сверяется с
+CustomUser.token_version, закэшированной на AUTH_TOKEN_VERSION_TIMEOUT.
+Кэш может быть своим у каждого воркера, поэтому для привилегированных
+токенов (администратор, модератор, staff) версия читается из базы на
+каждом запросе: их отзыв действует сразу во всех процессах.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken, TokenError)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from reviews.models import CustomUser
+
+VERSION_CLAIM = "ver"
+REVOKED = -1
+PRIVILEGED_ROLES = ("admin", "moderator")
+
+
+def version_key(user_id):
+    return f"auth:token-version:{user_id}"
+
+
+def load_token_version(user_id):
+    """Версия токенов пользователя из базы; REVOKED, если входа нет."""
+    version = CustomUser.objects.filter(
+        pk=user_id, is_active=True
+    ).values_list("token_version", flat=True).first()
+    return REVOKED if version is None else version
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя; REVOKED, если входа нет."""
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = load_token_version(user_id)
+        cache.set(
+            version_key(user_id), version,
+            settings.AUTH_TOKEN_VERSION_TIMEOUT,
+        )
+    return version
+
+
+def is_privileged(token):
+    return (
+        token.get("role") in PRIVILEGED_ROLES
+        or token.get("is_staff")
+        or token.get("is_superuser")
+    )
+
+
+def remember_token_version(user):
+    cache.set(
+        version_key(user.pk), user.token_version,
+        settings.AUTH_TOKEN_VERSION_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+def decode_token(raw_token):
+    """Проверка подписи и типа токена; успешные результаты кэшируются."""
+    return AccessToken(raw_token)
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь из claims токена, с теми же свойствами ролей."""
+
+    __hash__ = TokenUser.__hash__
+
+    def __eq__(self, other):
+        # Сравнение и с моделью пользователя, и с None в валидаторах DRF.
+        return self.pk == getattr(other, "pk", None)
+
+    @cached_property
+    def role(self):
+        return self.token.get("role")
+
+    @property
+    def is_user(self):
+        return self.role == "user"
+
+    @property
+    def is_moderator(self):
+        return self.role == "moderator"
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая строит пользователя из claims.
+
+    Токены, выданные до появления claims ролей, по-прежнему проверяются
+    через загрузку пользователя из базы.
+    """
+
+    def get_validated_token(self, raw_token):
+        try:
+            token = decode_token(raw_token)
+            # Срок проверяется каждый раз: токен мог истечь в кэше.
+            token.check_exp(current_time=aware_utcnow())
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return token
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Токен не содержит идентификатор пользователя.")
+        if is_privileged(validated_token):
+            version = load_token_version(user_id)
+        else:
+            version = get_token_version(user_id)
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                "Токен отозван.", code="token_revoked"
+            )
+        return api_settings.TOKEN_USER_CLASS(validated_token)
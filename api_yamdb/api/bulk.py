@@ -0,0 +1,141 @@
+"""Массовая загрузка и обновление произведений одним запросом.
+
+Элементы проверяются сериализатором по отдельности, slug категорий и
+жанров разрешаются одним запросом на модель, а корректные элементы
+записываются через bulk_create/bulk_update в одной транзакции. Ошибки
+возвращаются по каждому элементу и не мешают записи остальных.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import Category, Genre, Title
+
+from .cache import bump_versions
+from .serializers import TitleBulkSerializer
+
+UPDATE_FIELDS = ("name", "year", "description", "category", "updated_at")
+
+
+def validate_items(items):
+    """Возвращает список (данные, ошибки) в порядке элементов."""
+    checked = []
+    seen_ids = set()
+    for item in items:
+        serializer = TitleBulkSerializer(data=item)
+        if not serializer.is_valid():
+            checked.append((None, serializer.errors))
+            continue
+        data = serializer.validated_data
+        title_id = data.get("id")
+        if title_id is not None and title_id in seen_ids:
+            checked.append(
+                (None, {"id": ["Произведение уже есть в этой пачке."]})
+            )
+            continue
+        seen_ids.add(title_id)
+        checked.append((data, None))
+    return checked
+
+
+def load_references(valid):
+    """Словари slug -> id и множество существующих id произведений."""
+    category_slugs = {data["category"] for data in valid
+                      if data.get("category")}
+    genre_slugs = {slug for data in valid for slug in data.get("genre", ())}
+    title_ids = {data["id"] for data in valid if "id" in data}
+    categories = dict(
+        Category.objects.filter(slug__in=category_slugs)
+        .values_list("slug", "pk")
+    ) if category_slugs else {}
+    genres = dict(
+        Genre.objects.filter(slug__in=genre_slugs).values_list("slug", "pk")
+    ) if genre_slugs else {}
+    existing = set(
+        Title.objects.filter(pk__in=title_ids).values_list("pk", flat=True)
+    ) if title_ids else set()
+    return categories, genres, existing
+
+
+def resolve(data, categories, genres, existing):
+    """Строит произведение и id его жанров либо возвращает ошибки."""
+    errors = {}
+    category = data.get("category")
+    if category and category not in categories:
+        errors["category"] = [f"Категория {category} не найдена."]
+    missing = [slug for slug in data.get("genre", ()) if slug not in genres]
+    if missing:
+        errors["genre"] = [f"Жанр {slug} не найден." for slug in missing]
+    if "id" in data and data["id"] not in existing:
+        errors["id"] = ["Произведение не найдено."]
+    if errors:
+        return None, None, errors
+    title = Title(
+        pk=data.get("id"),
+        name=data["name"],
+        year=data["year"],
+        description=data.get("description"),
+        category_id=categories.get(category),
+    )
+    genre_ids = {genres[slug] for slug in data.get("genre", ())}
+    return title, genre_ids, None
+
+
+def assign_created_ids(created):
+    """Проставляет id произведениям, если bulk_create их не вернул.
+
+    Без RETURNING (SQLite) база держит блокировку записи с первой вставки
+    до конца транзакции, поэтому вставленные строки - последние по id и
+    идут в порядке списка.
+    """
+    ids = Title.objects.order_by("-pk").values_list("pk", flat=True)
+    for title, pk in zip(created, reversed(ids[:len(created)])):
+        title.pk = pk
+
+
+@transaction.atomic
+def write_titles(created, updated, links):
+    """Записывает произведения и заменяет их связи с жанрами."""
+    Title.objects.bulk_create(created)
+    if created and not connection.features.can_return_ids_from_bulk_insert:
+        assign_created_ids(created)
+    if updated:
+        now = timezone.now()
+        for title in updated:
+            title.updated_at = now
+        Title.objects.bulk_update(updated, UPDATE_FIELDS)
+    through = Title.genre.through
+    through.objects.filter(title__in=updated).delete()
+    through.objects.bulk_create(
+        through(title_id=title.pk, genre_id=genre_id)
+        for title, genre_ids in links
+        for genre_id in genre_ids
+    )
+    # bulk-операции не отправляют сигналов, кэш сбрасываем сами.
+    bump_versions("titles")
+
+
+def upsert_titles(items):
+    """Создаёт новые и обновляет произведения с id; результат по элементам."""
+    checked = validate_items(items)
+    references = load_references(
+        [data for data, errors in checked if errors is None]
+    )
+    results = []
+    created, updated, links = [], [], []
+    for data, errors in checked:
+        if errors is None:
+            title, genre_ids, errors = resolve(data, *references)
+        if errors is not None:
+            results.append({"status": "error", "errors": errors})
+            continue
+        (created if title.pk is None else updated).append(title)
+        links.append((title, genre_ids))
+        results.append(
+            {"status": "created" if title.pk is None else "updated"}
+        )
+    if links:
+        write_titles(created, updated, links)
+    titles = iter(title for title, _ in links)
+    for result in results:
+        if result["status"] != "error":
+            result["id"] = next(titles).pk
+    return results
@@ -0,0 +1,94 @@
+"""Кэш ответов каталога с версиями ресурсов.
+
+Ключ ответа включает версию ресурса, поэтому инвалидация - это просто
+увеличение счётчика: старые записи перестают запрашиваться и вытесняются
+по LRU или по истечении срока.
+"""
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+LOCK_STRIPES = 64
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+_local_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(resource):
+    return f"api:version:{resource}"
+
+
+def get_version(resource):
+    cache = get_cache()
+    version = cache.get(version_key(resource))
+    if version is not None:
+        return version
+    # Начальное значение от времени: если счётчик вытеснен из кэша,
+    # новая версия всё равно не совпадёт ни с одной из прежних.
+    cache.add(version_key(resource), int(time.time() * 1000), None)
+    return cache.get(version_key(resource))
+
+
+def bump_versions(*resources):
+    """Увеличивает версии ресурсов после фиксации транзакции."""
+    def bump():
+        cache = get_cache()
+        for resource in resources:
+            try:
+                cache.incr(version_key(resource))
+            except ValueError:
+                get_version(resource)
+    transaction.on_commit(bump)
+
+
+def normalize_query(query_params):
+    """Query string с отсортированными параметрами и значениями."""
+    return urlencode(sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+    ))
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кэша или результат compute() с защитой от лавины.
+
+    Внутри процесса одновременные промахи по ключу ждут одного вычисления
+    на блокировке; между процессами роль блокировки играет cache.add.
+    compute() возвращает пару (значение, нужно ли его кэшировать).
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with _local_locks[hash(key) % LOCK_STRIPES]:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        lock_key = f"{key}:lock"
+        owner = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not owner:
+            deadline = time.monotonic() + WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+        try:
+            value, cacheable = compute()
+            if cacheable:
+                cache.set(key, value, timeout)
+        finally:
+            if owner:
+                cache.delete(lock_key)
+    return value
@@ -0,0 +1,85 @@
+"""Вложенные дочерние объекты в ответе по параметру ?expand=.
+
+Дочерние объекты каждого уровня выбираются одним запросом на всю
+страницу родителей: оконная функция ROW_NUMBER() нумерует их внутри
+родителя, и в ответ попадают первые EXPAND_LIMIT. Количество запросов
+не зависит ни от размера страницы, ни от числа дочерних объектов.
+"""
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+EXPAND_PARAM = "expand"
+
+
+def parse_expand(request, allowed):
+    """Пути из ?expand=a,a.b; вложенный путь включает родительский."""
+    paths = set()
+    for value in request.query_params.getlist(EXPAND_PARAM):
+        for path in filter(None, value.split(",")):
+            if path not in allowed:
+                raise ValidationError(
+                    {EXPAND_PARAM: [f"Недопустимое значение: {path}."]}
+                )
+            parts = path.split(".")
+            paths.update(
+                ".".join(parts[:depth]) for depth in range(1, len(parts) + 1)
+            )
+    return paths
+
+
+def top_per_parent(queryset, parent_field, parent_ids, limit, ordering):
+    """Первые limit строк queryset для каждого родителя одним запросом."""
+    ranked = queryset.filter(
+        **{f"{parent_field}__in": parent_ids}
+    ).annotate(
+        row_num=Window(
+            expression=RowNumber(),
+            partition_by=[F(parent_field)],
+            order_by=[
+                F(field[1:]).desc() if field.startswith("-")
+                else F(field).asc()
+                for field in ordering
+            ],
+        ),
+    ).values("pk", "row_num")
+    # Django 2.2 не фильтрует по оконным выражениям, поэтому нумерация
+    # уходит во вложенный запрос.
+    sql, params = ranked.query.sql_with_params()
+    table = queryset.model._meta.db_table
+    pk_column = queryset.model._meta.pk.column
+    return queryset.extra(
+        where=[
+            f'"{table}"."{pk_column}" IN (SELECT ranked."{pk_column}" '
+            f'FROM ({sql}) ranked WHERE ranked.row_num <= %s)'
+        ],
+        params=[*params, limit],
+    ).order_by(parent_field, *ordering)
+
+
+def expand_objects(objects, paths, relations):
+    """Раскладывает дочерние объекты по родителям в атрибут expanded.
+
+    relations: путь -> (queryset, поле родителя, порядок). Уровни
+    обходятся от верхнего, так что для каждого пути нужен один запрос.
+    """
+    limit = settings.EXPAND_LIMIT
+    levels = {"": list(objects)}
+    for obj in levels[""]:
+        obj.expanded = {}
+    for path in sorted(paths, key=lambda path: path.count(".")):
+        parent_path, _, name = path.rpartition(".")
+        parents = {obj.pk: obj for obj in levels[parent_path]}
+        queryset, parent_field, ordering = relations[path]
+        for parent in parents.values():
+            parent.expanded[name] = []
+        children = list(top_per_parent(
+            queryset, parent_field, list(parents), limit, ordering
+        )) if parents else []
+        for child in children:
+            child.expanded = {}
+            parents[getattr(child, f"{parent_field}_id")].expanded[
+                name
+            ].append(child)
+        levels[path] = children
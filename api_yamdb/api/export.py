@@ -0,0 +1,69 @@
+"""Потоковая выгрузка каталога в NDJSON.
+
+Каждая строка - один объект: произведение (с жанрами и категорией),
+отзыв или комментарий в представлении API, с полем type и ссылкой на
+родителя. Строки читаются через iterator(chunk_size) - на PostgreSQL это
+серверный курсор, - и сериализуются порциями через api.rows, поэтому
+память не зависит от размера таблиц.
+"""
+import datetime
+from collections import OrderedDict
+from itertools import islice
+
+import orjson
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from reviews.models import Comment, Review, Title
+
+from .renderers import ORJSON_OPTIONS, encode_default
+from .rows import CommentRowSerializer, ReviewRowSerializer, TitleRowSerializer
+
+CHUNK_SIZE = 2000
+
+# Тип строки, queryset, сериализатор строк, поле родителя.
+EXPORTS = (
+    ("title", Title.objects.order_by("pk"), TitleRowSerializer, None),
+    ("review", Review.objects.order_by("pk"), ReviewRowSerializer, "title"),
+    (
+        "comment", Comment.objects.order_by("pk"), CommentRowSerializer,
+        "review",
+    ),
+)
+
+
+def parse_since(value):
+    """Дата или дата со временем ISO 8601; без зоны - в TIME_ZONE."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Некорректная дата: {value}")
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+def export_lines(since=None, using=None, chunk_size=CHUNK_SIZE):
+    """Строки NDJSON (bytes) всех объектов, изменённых начиная с since."""
+    for kind, queryset, serializer_class, parent in EXPORTS:
+        queryset = queryset.using(using)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        serializer = serializer_class(using=using)
+        extra = (parent,) if parent else ()
+        rows = serializer.rows(queryset, *extra).iterator(
+            chunk_size=chunk_size
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            for row, data in zip(chunk, serializer.to_representation(chunk)):
+                record = OrderedDict([("type", kind)])
+                if parent:
+                    record[parent] = getattr(row, parent)
+                record.update(data)
+                yield orjson.dumps(
+                    record, default=encode_default, option=ORJSON_OPTIONS
+                ) + b"\n"
@@ -1,20 +1,37 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, Q
 from django_filters import rest_framework as filter
-from reviews.models import Title
+from rest_framework.filters import OrderingFilter, SearchFilter
+from reviews.models import Category, Title
+
+from .search import search
+
+
+class CharInFilter(filter.BaseInFilter, filter.CharFilter):
+    """Несколько значений через запятую."""
 
 
 class TitleFilter(filter.FilterSet):
-    category = filter.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
+    """Фильтры произведений.
+
+    Жанр и категория сравниваются со slug точно (по уникальному индексу);
+    ``genre`` и ``category`` принимают несколько значений через запятую
+    (любое из), ``genre_all`` - жанры, которые должны быть все сразу.
+    С ``fuzzy=true`` значения ищутся как подстроки slug. Жанры
+    проверяются подзапросом к таблице связей, поэтому произведение не
+    повторяется в выдаче.
+    """
+
+    category = CharInFilter(method='filter_category')
     name = filter.CharFilter(
         field_name='name',
-        lookup_expr='icontains'
-    )
-    genre = filter.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+        method='search_name',
     )
+    genre = CharInFilter(method='filter_genre')
+    genre_all = CharInFilter(method='filter_genre_all')
+    fuzzy = filter.BooleanFilter(method='filter_fuzzy')
     year = filter.CharFilter(
         field_name='year',
         lookup_expr='exact',
@@ -22,4 +39,88 @@ class TitleFilter(filter.FilterSet):
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'category', 'genre')
+        fields = ('name', 'year', 'category', 'genre', 'genre_all', 'fuzzy')
+
+    def search_name(self, queryset, name, value):
+        return search(queryset, name, value)
+
+    def filter_fuzzy(self, queryset, name, value):
+        return queryset  # меняет поведение genre и category
+
+    def slug_condition(self, values, prefix=''):
+        if not self.form.cleaned_data.get('fuzzy'):
+            return Q(**{f'{prefix}slug__in': values})
+        return reduce(or_, (
+            Q(**{f'{prefix}slug__icontains': value}) for value in values
+        ))
+
+    def filter_category(self, queryset, name, value):
+        values = [slug for slug in value if slug]
+        if not values:
+            return queryset
+        return queryset.filter(category__in=Category.objects.filter(
+            self.slug_condition(values)
+        ).values('pk'))
+
+    def genre_links(self, values):
+        return Title.genre.through.objects.filter(
+            self.slug_condition(values, prefix='genre__')
+        )
+
+    def filter_genre(self, queryset, name, value):
+        values = [slug for slug in value if slug]
+        if not values:
+            return queryset
+        return queryset.filter(
+            pk__in=self.genre_links(values).values('title_id')
+        )
+
+    def filter_genre_all(self, queryset, name, value):
+        values = {slug for slug in value if slug}
+        if not values:
+            return queryset
+        if self.form.cleaned_data.get('fuzzy'):
+            # Для каждой подстроки нужен свой подходящий жанр.
+            for slug in values:
+                queryset = self.filter_genre(queryset, name, [slug])
+            return queryset
+        return queryset.filter(pk__in=self.genre_links(values).values(
+            'title_id'
+        ).annotate(matched=Count('genre_id')).filter(
+            matched=len(values)
+        ).values('title_id'))
+
+
+class RankedSearchFilter(SearchFilter):
+    """SearchFilter через бэкенд поиска: индекс и ранжирование.
+
+    Запрос ищется целиком по первому полю из search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        search_fields = self.get_search_fields(view, request)
+        if not query or not search_fields:
+            return queryset
+        return search(queryset, search_fields[0], query)
+
+
+class AliasOrderingFilter(OrderingFilter):
+    """OrderingFilter с именами полей из API.
+
+    view.ordering_aliases сопоставляет имя в параметре ordering полю
+    модели, например reviews_count -> review_count. Последним ключом
+    добавляется pk, чтобы порядок страниц был однозначным.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        aliases = getattr(view, 'ordering_aliases', {})
+        resolved = []
+        for term in ordering:
+            descending = term.startswith('-')
+            field = aliases.get(term.lstrip('-'), term.lstrip('-'))
+            resolved.append(f'-{field}' if descending else field)
+        return [*resolved, 'pk']
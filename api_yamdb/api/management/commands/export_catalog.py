@@ -0,0 +1,60 @@
+import gzip
+import sys
+from contextlib import ExitStack
+
+from api.export import CHUNK_SIZE, export_lines, parse_since
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузка произведений, отзывов и комментариев в NDJSON "
+        "(по объекту в строке) потоком, без загрузки таблиц в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Файл для выгрузки, по умолчанию stdout.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Только объекты, изменённые начиная с даты (ISO 8601).",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Сжать выгрузку gzip.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Сколько строк читать из курсора за раз.",
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+        with ExitStack() as stack:
+            if options["output"] == "-":
+                stream = sys.stdout.buffer
+            else:
+                stream = stack.enter_context(open(options["output"], "wb"))
+            if options["gzip"]:
+                stream = stack.enter_context(
+                    gzip.GzipFile(fileobj=stream, mode="wb")
+                )
+            count = 0
+            for line in export_lines(
+                since or None, chunk_size=options["chunk_size"]
+            ):
+                stream.write(line)
+                count += 1
+            stream.flush()
+        self.stderr.write(f"Выгружено объектов: {count}")
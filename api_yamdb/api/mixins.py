@@ -1,4 +1,37 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from api_yamdb.db_router import read_from_primary
+
+from .cache import get_or_compute, get_version, normalize_query
+from .expand import expand_objects, parse_expand
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+def set_validators(response, etag, last_modified):
+    if etag is not None:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 (или 412), если условия запроса выполнены, иначе None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
 
 
 class ListCreateDestroyViewSet(
@@ -8,3 +41,293 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class CachedListMixin:
+    """Кэширует ответы list по версии ресурса cache_resource."""
+
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def get_cache_resources(self, request):
+        """Ресурсы, от версий которых зависит ответ."""
+        return (self.cache_resource,)
+
+    def get_cache_key(self, request):
+        url = "?".join((
+            request.build_absolute_uri(request.path),
+            normalize_query(request.query_params),
+        ))
+        # Формат в ключе: ETag зависит от представления (make_etag).
+        return "api:{}:{}:{}:{}".format(
+            self.cache_resource,
+            ".".join(
+                str(get_version(resource))
+                for resource in self.get_cache_resources(request)
+            ),
+            request.accepted_renderer.format,
+            hashlib.md5(url.encode("utf-8")).hexdigest(),
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return handler(request, *args, **kwargs)
+        computed = {}
+
+        def compute():
+            # Ответ ляжет в кэш под текущей версией ресурса, поэтому он
+            # читается из default: отстающая реплика могла ещё не
+            # получить запись, которая эту версию увеличила.
+            with read_from_primary():
+                response = handler(request, *args, **kwargs)
+            computed["response"] = response
+            headers = {
+                header: response[header]
+                for header in VALIDATOR_HEADERS
+                if response.has_header(header)
+            }
+            return (
+                (getattr(response, "data", None), headers),
+                response.status_code == 200,
+            )
+
+        data, headers = get_or_compute(
+            self.get_cache_key(request), compute, timeout
+        )
+        if "response" in computed:
+            return computed["response"]
+        if headers:
+            # Валидаторы закэшированы вместе с данными: 304 без запросов.
+            etag = headers.get("ETag")
+            last_modified = parse_http_date_safe(headers.get("Last-Modified"))
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+        response = Response(data)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SparseFieldsMixin:
+    """Только запрошенные поля (?fields=id,name) в ответе и в SELECT.
+
+    sparse_columns: поле ответа -> колонки для only(), по умолчанию
+    одноимённая колонка. sparse_related: поле ответа -> связь, которая
+    нужна только ему; связи базового queryset сбрасываются и
+    возвращаются для запрошенных полей (select_related для ForeignKey,
+    prefetch_related для остальных). sparse_required - колонки, которые
+    читает не сериализатор, а, например, пагинация.
+    """
+
+    fields_param = "fields"
+    sparse_columns = {}
+    sparse_related = {}
+    sparse_required = ()
+
+    def get_sparse_fields(self):
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+        self._sparse_fields = None
+        value = self.request.query_params.get(self.fields_param)
+        if value and self.action in ("list", "retrieve"):
+            fields = set(filter(None, value.split(",")))
+            readable = {
+                name
+                for name, field in self.get_serializer_class()().fields.items()
+                if not field.write_only
+            }
+            unknown = sorted(fields - readable)
+            if unknown:
+                raise ValidationError({self.fields_param: [
+                    f"Недопустимое поле: {name}." for name in unknown
+                ]})
+            self._sparse_fields = fields
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        queryset = queryset.select_related(None).prefetch_related(None)
+        columns = {"pk", *self.sparse_required}
+        for name in fields:
+            columns.update(self.sparse_columns.get(name, (name,)))
+            related = self.sparse_related.get(name)
+            if related is None:
+                continue
+            if queryset.model._meta.get_field(related).many_to_one:
+                queryset = queryset.select_related(related)
+            else:
+                queryset = queryset.prefetch_related(related)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - fields:
+                target.fields.pop(name)
+        return serializer
+
+
+class ExpandMixin:
+    """Вложенные дочерние объекты в list и retrieve по ?expand=.
+
+    expand_relations: путь -> (queryset, поле родителя, порядок). Даты
+    родителя не отражают правки вложенных объектов, поэтому ответы с
+    expand отдаются без ETag и Last-Modified; миксин ставится перед
+    ConditionalGetMixin.
+    """
+
+    expand_relations = {}
+
+    def get_expand(self):
+        if not hasattr(self, "_expand"):
+            self._expand = set()
+            if self.action in ("list", "retrieve"):
+                self._expand = parse_expand(
+                    self.request, self.expand_relations
+                )
+        return self._expand
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.get_expand():
+            objects = args[0] if kwargs.get("many") else [args[0]]
+            expand_objects(objects, self.get_expand(), self.expand_relations)
+        return super().get_serializer(*args, **kwargs)
+
+    def conditional_response(self, validators, handler, request, *args,
+                             **kwargs):
+        if self.get_expand():
+            return handler(request, *args, **kwargs)
+        return super().conditional_response(
+            validators, handler, request, *args, **kwargs
+        )
+
+
+class RowListMixin:
+    """list через RowSerializer (api.rows) вместо ModelSerializer.
+
+    Ставится последним перед базовым классом представления, чтобы кэш
+    и условные запросы оборачивали и этот путь. Ответы с expand идут
+    обычным путём: вложенные объекты раскладываются по моделям.
+    """
+
+    row_serializer_class = None
+
+    def use_row_serializer(self):
+        get_expand = getattr(self, "get_expand", None)
+        return self.row_serializer_class is not None and not (
+            get_expand and get_expand()
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_row_serializer():
+            return super().list(request, *args, **kwargs)
+        get_sparse_fields = getattr(self, "get_sparse_fields", None)
+        serializer = self.row_serializer_class(
+            get_sparse_fields() if get_sparse_fields else None
+        )
+        queryset = serializer.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve по полю updated_at.
+
+    Валидаторы считаются одним агрегирующим запросом до выборки страницы,
+    поэтому на совпавший If-None-Match или If-Modified-Since ответ 304
+    отдаётся без сериализации. Количество строк в ETag учитывает удаления,
+    которые не меняют максимальную дату. Если удаление не сдвигает дату
+    родительского объекта, list_last_modified нужно выключить.
+    """
+
+    last_modified_field = "updated_at"
+    list_last_modified = True
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_list_validators, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_object_validators, super().retrieve,
+            request, *args, **kwargs
+        )
+
+    def conditional_response(self, validators, handler, request, *args,
+                             **kwargs):
+        etag, last_modified = validators(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified)
+        return response
+
+    def get_list_stats(self):
+        """Количество строк и последняя дата изменения списка."""
+        return self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            count=Count("pk"),
+            last_modified=Max(self.last_modified_field),
+        )
+
+    def get_list_validators(self, request):
+        stats = self.get_list_stats()
+        if stats is None:
+            return None, None
+        last_modified = stats["last_modified"]
+        etag = self.make_etag(request, stats["count"], last_modified)
+        if not self.list_last_modified:
+            last_modified = None
+        return etag, self.timestamp(last_modified)
+
+    def get_object_validators(self, request):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(self.last_modified_field, flat=True)
+            .first()
+        )
+        if last_modified is None:  # 404 отдаст обычный обработчик
+            return None, None
+        etag = self.make_etag(request, last_modified)
+        return etag, self.timestamp(last_modified)
+
+    def make_etag(self, request, *parts):
+        """ETag от состояния данных, адреса и формата ответа."""
+        source = "|".join(str(part) for part in (
+            request.path,
+            normalize_query(request.query_params),
+            request.accepted_renderer.media_type,
+            *parts,
+        ))
+        return quote_etag(hashlib.md5(source.encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def timestamp(value):
+        return None if value is None else int(value.timestamp())
@@ -0,0 +1,153 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class BoundedLimitOffsetPagination(LimitOffsetPagination):
+    """Limit/offset с ограничением limit сверху (PAGE_MAX_LIMIT).
+
+    Больший limit не ошибка: страница просто обрезается до максимума.
+    """
+
+    @property
+    def max_limit(self):
+        return settings.PAGE_MAX_LIMIT
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу (pub_date, id) с непрозрачным курсором.
+
+    Страница выбирается условием по составному индексу, а не OFFSET,
+    поэтому глубина страницы не влияет на стоимость запроса, а новые
+    записи не сдвигают уже выданные.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Некорректный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(request)
+
+        if position is None:
+            rows = queryset.order_by("pub_date", "id")
+        elif reverse:
+            pub_date, pk = position
+            rows = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            ).order_by("-pub_date", "-id")
+        else:
+            pub_date, pk = position
+            rows = queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+            ).order_by("pub_date", "id")
+
+        page = list(rows[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, settings.PAGE_MAX_LIMIT)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            tokens = parse.parse_qs(
+                b64decode(encoded.encode("ascii")).decode("ascii"),
+                keep_blank_values=True,
+            )
+            reverse = tokens["r"][0] == "1"
+            pub_date = parse_datetime(tokens["d"][0])
+            pk = int(tokens["i"][0])
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, (pub_date, pk)
+
+    def encode_cursor(self, reverse, obj):
+        # obj - модель или строка values_list(named=True), у обеих есть id.
+        tokens = {
+            "r": "1" if reverse else "0",
+            "d": obj.pub_date.isoformat(),
+            "i": obj.id,
+        }
+        encoded = b64encode(parse.urlencode(tokens).encode("ascii"))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def get_first_link(self):
+        return replace_query_param(self.base_url, self.cursor_query_param, "")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return self.get_first_link()
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return self.get_first_link()
+        return self.encode_cursor(True, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+
+class LimitOffsetOrKeysetPagination(BoundedLimitOffsetPagination):
+    """Limit/offset по умолчанию, курсор - если передан параметр cursor.
+
+    Первая страница в режиме курсора запрашивается с пустым значением:
+    ``?cursor=``, дальше клиент переходит по ссылкам next/previous.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -30,7 +30,7 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
         )
 
     def has_object_permission(self, request, view, obj):
-        return (obj.author == request.user) or (
+        return (obj.author_id == request.user.pk) or (
             request.user.is_authenticated and request.user.is_admin
         )
 
@@ -46,7 +46,7 @@ class IsAuthorOrAdminOrModerator(permissions.BasePermission):
         return request.user.is_authenticated and (
             request.user.is_admin
             or request.user.is_moderator
-            or (obj.author == request.user)
+            or (obj.author_id == request.user.pk)
             or request.user.is_staff
         )
 
@@ -0,0 +1,102 @@
+"""Поиск по подстроке в названиях с ранжированием результатов.
+
+Бэкенд выбирается настройкой SEARCH_BACKEND. Индексы для него создаёт
+миграция reviews 0008: GIN с pg_trgm на PostgreSQL и теневые таблицы
+FTS5 с триггерами на SQLite.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Value
+from django.db.models.functions import Length, StrIndex, Upper
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Запросы короче триграммы индекс не сужает, их выполняет BasicSearch.
+MIN_INDEXED_LENGTH = 3
+
+
+class BasicSearch:
+    """Поиск через icontains без индекса.
+
+    Ранжирование: сначала совпадения ближе к началу названия, затем более
+    короткие названия.
+    """
+
+    def search(self, queryset, field, query):
+        return queryset.filter(**{f"{field}__icontains": query}).annotate(
+            search_position=StrIndex(Upper(field), Upper(Value(query))),
+            search_length=Length(field),
+        ).order_by("search_position", "search_length", "pk")
+
+
+class TrigramSearch(BasicSearch):
+    """PostgreSQL: icontains по индексу GIN (UPPER(name) gin_trgm_ops).
+
+    Результаты упорядочены по триграммному сходству с запросом. Если
+    расширение pg_trgm не установлено, поиск идёт без индекса.
+    """
+
+    available = {}
+
+    def search(self, queryset, field, query):
+        if len(query) < MIN_INDEXED_LENGTH or not self.is_available(
+            queryset.db
+        ):
+            return super().search(queryset, field, query)
+        return queryset.filter(**{f"{field}__icontains": query}).annotate(
+            search_rank=TrigramSimilarity(field, query),
+        ).order_by(F("search_rank").desc(), "pk")
+
+    def is_available(self, alias):
+        if alias not in self.available:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                )
+                self.available[alias] = cursor.fetchone() is not None
+            if not self.available[alias]:
+                logger.warning(
+                    "Расширение pg_trgm не установлено, поиск выполняется "
+                    "без индекса."
+                )
+        return self.available[alias]
+
+
+class FTS5Search(BasicSearch):
+    """SQLite: теневая таблица FTS5 с токенизатором trigram.
+
+    Таблица ``<таблица модели>_fts`` хранит только индекс (external
+    content), триггеры синхронизируют её с основной таблицей. Порядок - по
+    bm25 (rank), чем меньше, тем лучше.
+    """
+
+    def search(self, queryset, field, query):
+        if len(query) < MIN_INDEXED_LENGTH:
+            return super().search(queryset, field, query)
+        table = queryset.model._meta.db_table
+        fts_table = f"{table}_fts"
+        pk_column = queryset.model._meta.pk.column
+        # Запрос целиком как фраза: для trigram это поиск подстроки.
+        match = '"{}"'.format(query.replace('"', '""'))
+        return queryset.extra(
+            tables=[fts_table],
+            where=[
+                f'"{fts_table}".rowid = "{table}"."{pk_column}"',
+                f'"{fts_table}" MATCH %s',
+            ],
+            params=[match],
+            select={"search_rank": f'"{fts_table}".rank'},
+        ).order_by("search_rank", "pk")
+
+
+def get_search_backend():
+    return import_string(settings.SEARCH_BACKENDS[settings.SEARCH_BACKEND])()
+
+
+def search(queryset, field, query):
+    """Отфильтровать queryset по подстроке query в поле field."""
+    return get_search_backend().search(queryset, field, query.strip())
@@ -1,10 +1,31 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils.crypto import get_random_string
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
-from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.models import (Category, Comment, CustomUser, Genre, OutboxEmail,
+                            Review, Title)
+
+
+class ExpandableSerializerMixin:
+    """Добавляет вложенные объекты, выбранные представлением (api.expand).
+
+    Поле появляется в ответе, только если его запросили через ?expand=.
+    """
+
+    def get_expandable_fields(self):
+        return {}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expanded = getattr(instance, "expanded", {})
+        for name, serializer_class in self.get_expandable_fields().items():
+            if name in expanded:
+                data[name] = serializer_class(
+                    expanded[name], many=True, context=self.context
+                ).data
+        return data
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -42,14 +63,17 @@ class UserSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if request and hasattr(request, "user"):
             current_user_admin = request.user.is_admin
-        if not current_user_admin:  # отправка, если не админ
-            send_mail(
-                "Код подтверждения для регистрации YamDB",
-                f"{username} Ваш код подтверждения: {confirmation_code}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=(email,),
-            )
-        user.save()
+        with transaction.atomic():
+            user.save()
+            if not current_user_admin:  # отправка, если не админ
+                # Письмо отправит команда send_outbox, не этот запрос.
+                OutboxEmail.objects.create(
+                    subject="Код подтверждения для регистрации YamDB",
+                    body=f"{username} Ваш код подтверждения: "
+                         f"{confirmation_code}",
+                    from_email=settings.EMAIL_HOST_USER,
+                    recipient=email,
+                )
         return validated_data
 
 
@@ -71,11 +95,15 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(ExpandableSerializerMixin,
+                      serializers.ModelSerializer):
     """Сериализатор для GET."""
 
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
+    reviews_count = serializers.IntegerField(
+        source="review_count", read_only=True
+    )
 
     class Meta:
         model = Title
@@ -84,12 +112,16 @@ class TitleSerializer(serializers.ModelSerializer):
             "name",
             "year",
             "rating",
+            "reviews_count",
             "description",
             "genre",
             "category",
         )
         # read_only_fields = ("id",)
 
+    def get_expandable_fields(self):
+        return {"reviews": ReviewSerializer}
+
 
 class TitleCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для POST, PATH."""
@@ -113,7 +145,33 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки произведений.
+
+    Slug категории и жанров проверяются только по формату: ссылки
+    разрешаются разом для всей пачки в api.bulk.
+    """
+
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField(required=False, allow_null=True)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+
+    class Meta:
+        model = Title
+        fields = (
+            "id",
+            "name",
+            "year",
+            "description",
+            "genre",
+            "category",
+        )
+
+
+class ReviewSerializer(ExpandableSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field="username",
@@ -130,8 +188,21 @@ class ReviewSerializer(serializers.ModelSerializer):
                 queryset=Review.objects.all(), fields=["author", "title"]
             )
         ]
-        fields = ("id", "text", "author", "score", "pub_date", "title")
-        read_only_fields = ("id", "author", "pub_date", "title")
+        fields = (
+            "id",
+            "text",
+            "author",
+            "score",
+            "pub_date",
+            "comments_count",
+            "title",
+        )
+        read_only_fields = (
+            "id", "author", "pub_date", "comments_count", "title"
+        )
+
+    def get_expandable_fields(self):
+        return {"comments": CommentSerializer}
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.signals import data_imported
+
+from .authentication import version_key
+from .cache import bump_versions
+
+# Какие закэшированные ресурсы устаревают при изменении модели:
+# произведения содержат жанры, категорию и рейтинг по отзывам, а с
+# ?expand= - ещё и сами отзывы с комментариями.
+INVALIDATES = {
+    Title: ("titles",),
+    Genre: ("genres", "titles"),
+    Category: ("categories", "titles"),
+    Review: ("titles",),
+    Comment: ("comments",),
+}
+
+
+def invalidate_catalog(sender, **kwargs):
+    bump_versions(*INVALIDATES[sender])
+
+
+# Только для моделей каталога: приёмник удаления без sender отключил бы
+# быстрое удаление (без выборки строк) у всех моделей проекта.
+for model in INVALIDATES:
+    post_save.connect(invalidate_catalog, sender=model)
+    post_delete.connect(invalidate_catalog, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, instance, reverse, pk_set,
+                            **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_versions("titles")
+    # После clear связей уже нет, поэтому очистку отмечаем заранее.
+    if action in ("post_add", "post_remove", "pre_clear"):
+        if not reverse:
+            titles = [instance.pk]
+        elif pk_set is None:
+            titles = instance.titles.values("pk")
+        else:
+            titles = pk_set
+        Title.objects.filter(pk__in=titles).update(updated_at=timezone.now())
+
+
+# Представление произведения включает названия жанров и категории, поэтому
+# их изменение сдвигает updated_at связанных произведений (ETag и
+# Last-Modified). При удалении связи ещё на месте только в pre_delete.
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles(sender, instance, created=False, **kwargs):
+    if not created:
+        instance.titles.update(updated_at=timezone.now())
+
+
+@receiver(data_imported)
+def invalidate_everything(sender, **kwargs):
+    bump_versions("titles", "genres", "categories", "comments")
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_token_version(sender, instance, **kwargs):
+    # Следующий запрос с токеном пользователя прочитает версию из базы.
+    key = version_key(instance.pk)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# Отзывы и комментарии пользователя удаляются каскадом, мимо
+# представлений, поэтому счётчики их родителей уменьшаем здесь.
+@receiver(pre_delete, sender=CustomUser)
+def subtract_user_content(sender, instance, **kwargs):
+    reviews = Review.objects.filter(author=instance)
+    totals = Title.objects.review_totals(reviews)
+    Title.objects.filter(pk__in=reviews.values("title")).update(
+        score_sum=F("score_sum") - totals["score_sum"],
+        review_count=F("review_count") - totals["review_count"],
+        updated_at=timezone.now(),
+    )
+    comments = Comment.objects.filter(author=instance)
+    Review.objects.filter(pk__in=comments.values("review")).update(
+        comments_count=(
+            F("comments_count") - Review.objects.comment_totals(comments)
+        ),
+        updated_at=timezone.now(),
+    )
@@ -1,10 +1,19 @@
 from rest_framework_simplejwt.tokens import AccessToken
 
+from .authentication import remember_token_version
+
 
 def get_jwt_token(user):
     """Получает только jwt токен. В refresh токене нет необходимости."""
     token = AccessToken.for_user(user)
     token['email'] = user.email
+    # Claims для ClaimsJWTAuthentication: права без запроса к базе.
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['ver'] = user.token_version
+    remember_token_version(user)
 
     return {
         "token": str(token)
@@ -3,7 +3,7 @@ from rest_framework import routers
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                     ReviewViewSet, SignupViewSet, TitleViewSet, UserViewSet,
-                    create_jwt_token)
+                    create_jwt_token, export_catalog)
 
 router = routers.DefaultRouter()
 router.register(r"users", UserViewSet, basename='users')
@@ -23,5 +23,6 @@ router.register(
 urlpatterns = [
     path("v1/auth/signup/", SignupViewSet.as_view()),
     path("v1/auth/token/", create_jwt_token),
+    path("v1/export/", export_catalog),
     path("v1/", include(router.urls)),
 ]
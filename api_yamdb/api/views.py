@@ -1,27 +1,44 @@
 from django.core.exceptions import PermissionDenied
-from django.db.models import Avg
+from django.db import router, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce, Greatest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.generics import CreateAPIView
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
 
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from .bulk import upsert_titles
+from .export import export_lines, parse_since
+from .filters import AliasOrderingFilter, RankedSearchFilter, TitleFilter
+from .mixins import (CachedListMixin, CachedListRetrieveMixin,
+                     ConditionalGetMixin, ExpandMixin,
+                     ListCreateDestroyViewSet, RowListMixin, SparseFieldsMixin)
+from .pagination import (BoundedLimitOffsetPagination,
+                         LimitOffsetOrKeysetPagination)
 from .permissions import (IsAdminOrReadOnly, IsAdminOrSuperuser,
                           IsAuthorizedOrReadOnly, IsAuthorOrAdminOrModerator,
                           ProfilePermission)
+from .rows import CommentRowSerializer, ReviewRowSerializer, TitleRowSerializer
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer,
                           TitleCreateSerializer, TitleSerializer,
                           UserSerializer)
 from .tokens import get_jwt_token
 
+# Вложенные отзывы и комментарии (?expand=): сначала новые.
+EXPANDED_REVIEWS = (
+    Review.objects.select_related("author"), "title", ("-pub_date", "-id")
+)
+EXPANDED_COMMENTS = (
+    Comment.objects.select_related("author"), "review", ("-pub_date", "-id")
+)
+
 
 class SignupViewSet(CreateAPIView):
     permission_classes = (AllowAny,)
@@ -49,10 +66,30 @@ def create_jwt_token(request):
     return Response(get_jwt_token(user), status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminOrSuperuser])
+def export_catalog(request):
+    """Весь каталог потоком NDJSON; ?since= - только изменённое с даты."""
+    since = request.query_params.get("since") or None
+    if since is not None:
+        try:
+            since = parse_since(since)
+        except ValueError as error:
+            raise ValidationError({"since": [str(error)]})
+    # Маршрут чтения выбирается сейчас: поток читается уже после выхода
+    # из ReplicaMiddleware.
+    response = StreamingHttpResponse(
+        export_lines(since, using=router.db_for_read(Title)),
+        content_type="application/x-ndjson",
+    )
+    response["Content-Disposition"] = 'attachment; filename="catalog.ndjson"'
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = BoundedLimitOffsetPagination
     lookup_field = "username"
 
     def get_permissions(self):
@@ -86,44 +123,96 @@ class UserViewSet(viewsets.ModelViewSet):
         return super(UserViewSet, self).partial_update(request)
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, SparseFieldsMixin,
+                      ListCreateDestroyViewSet):
+    cache_resource = "categories"
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    pagination_class = LimitOffsetPagination
-    filter_backends = (filters.SearchFilter,)
+    pagination_class = BoundedLimitOffsetPagination
+    filter_backends = (RankedSearchFilter,)
     permission_classes = (IsAdminOrReadOnly,)
     search_fields = ("name",)
     lookup_field = "slug"
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, SparseFieldsMixin,
+                   ListCreateDestroyViewSet):
+    cache_resource = "genres"
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = BoundedLimitOffsetPagination
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (RankedSearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(CachedListRetrieveMixin, SparseFieldsMixin, ExpandMixin,
+                   ConditionalGetMixin, RowListMixin, viewsets.ModelViewSet):
+    cache_resource = "titles"
+    # Удаление произведения не оставляет следа в датах остальных.
+    list_last_modified = False
+    queryset = Title.objects.select_related("category").prefetch_related(
+        "genre"
+    )
     serializer_class = TitleSerializer
-    pagination_class = LimitOffsetPagination
+    row_serializer_class = TitleRowSerializer
+    pagination_class = BoundedLimitOffsetPagination
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, AliasOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ("name", "year", "reviews_count")
+    ordering_aliases = {"reviews_count": "review_count"}
+    sparse_columns = {
+        "rating": ("score_sum", "review_count"),
+        "reviews_count": ("review_count",),
+        "genre": (),
+    }
+    sparse_related = {"genre": "genre", "category": "category"}
+    expand_relations = {
+        "reviews": EXPANDED_REVIEWS,
+        "reviews.comments": EXPANDED_COMMENTS,
+    }
+    bulk_max_items = 1000
+
+    def get_cache_resources(self, request):
+        # Отзывы сбрасывают версию titles, комментарии - свою; от
+        # комментариев зависит и comments_count вложенных отзывов.
+        if "reviews" in self.get_expand():
+            return ("titles", "comments")
+        return ("titles",)
 
     def get_serializer_class(self):
         if self.request.method in ("POST", "PATCH"):
             return TitleCreateSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Массовое создание и обновление (элементы с id) произведений."""
+        if not isinstance(request.data, list):
+            raise ValidationError("Ожидается массив произведений.")
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError(
+                f"Не больше {self.bulk_max_items} произведений за запрос."
+            )
+        return Response({"results": upsert_titles(request.data)})
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsMixin, ExpandMixin, ConditionalGetMixin,
+                    RowListMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    row_serializer_class = ReviewRowSerializer
+    pagination_class = LimitOffsetOrKeysetPagination
     permission_classes = (IsAuthorizedOrReadOnly,)
+    # В режиме курсора порядок задаёт пагинация: (pub_date, id).
+    filter_backends = (AliasOrderingFilter,)
+    ordering_fields = ("pub_date", "score", "comments_count")
+    sparse_columns = {"author": ("author__username",)}
+    sparse_related = {"author": "author"}
+    # Курсор строится по (pub_date, id) последней строки страницы.
+    sparse_required = ("pub_date",)
+    expand_relations = {"comments": EXPANDED_COMMENTS}
 
     def get_permissions(self):
         if (self.action == "update") or (self.action == "destroy"):
@@ -134,30 +223,44 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         title_id = self.kwargs.get("title_id")
-        return Review.objects.filter(title=title_id)
+        return Review.objects.filter(title=title_id).select_related("author")
+
+    def get_list_stats(self):
+        # Удаление отзыва сдвигает updated_at произведения через add_score.
+        return Title.objects.filter(pk=self.kwargs.get("title_id")).values(
+            "pk"
+        ).annotate(
+            count=Count("reviews"),
+            last_modified=Greatest(
+                "updated_at",
+                Coalesce(Max("reviews__updated_at"), "updated_at"),
+            ),
+        ).first()
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
         if Review.objects.filter(
-            title=title, author=self.request.user
+            title=title, author=self.request.user.pk
         ).exists():
             raise ValidationError(code=400)
-        serializer.save(
-            author=self.request.user,
-            title=title,
-        )
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
+        with transaction.atomic():
+            review = serializer.save(
+                author_id=self.request.user.pk,
+                title=title,
+            )
+            Title.objects.filter(pk=title.pk).add_score(review.score, 1)
 
     def perform_update(self, serializer):
-        if serializer.instance.author != self.request.user:
+        if serializer.instance.author_id != self.request.user.pk:
             raise PermissionDenied("Изменение чужих постов запрещено!")
-        serializer.save()
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
+        with transaction.atomic():
+            old_score = Review.objects.select_for_update().values_list(
+                "score", flat=True
+            ).get(pk=serializer.instance.pk)
+            review = serializer.save()
+            Title.objects.filter(pk=review.title_id).add_score(
+                review.score - old_score
+            )
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -165,17 +268,25 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_destroy(self, instance):
-        instance.delete()
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        with transaction.atomic():
+            score = Review.objects.select_for_update().values_list(
+                "score", flat=True
+            ).filter(pk=instance.pk).first()
+            if score is None:  # уже удалён параллельным запросом
+                return
+            instance.delete()
+            Title.objects.filter(pk=instance.title_id).add_score(-score, -1)
+
+
+class CommentViewSet(SparseFieldsMixin, ConditionalGetMixin, RowListMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    row_serializer_class = CommentRowSerializer
+    pagination_class = LimitOffsetOrKeysetPagination
     permission_classes = (IsAuthorizedOrReadOnly,)
+    sparse_columns = {"author": ("author__username",)}
+    sparse_related = {"author": "author"}
+    sparse_required = ("pub_date",)
 
     def get_permissions(self):
         if (self.action == "update") or (self.action == "destroy"):
@@ -186,17 +297,32 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         review_id = self.kwargs.get("review_id")
-        return Comment.objects.filter(review=review_id)
+        return Comment.objects.filter(review=review_id).select_related(
+            "author"
+        )
+
+    def get_list_stats(self):
+        return Review.objects.filter(
+            pk=self.kwargs.get("review_id"), title=self.kwargs.get("title_id")
+        ).values("pk").annotate(
+            count=Count("comments"),
+            last_modified=Greatest(
+                "updated_at",
+                Coalesce(Max("comments__updated_at"), "updated_at"),
+            ),
+        ).first()
 
     def perform_create(self, serializer):
         review = get_object_or_404(Review, pk=self.kwargs.get("review_id"))
-        serializer.save(
-            author=self.request.user,
-            review=review,
-        )
+        with transaction.atomic():
+            serializer.save(
+                author_id=self.request.user.pk,
+                review=review,
+            )
+            Review.objects.filter(pk=review.pk).add_comments(1)
 
     def perform_update(self, serializer):
-        if serializer.instance.author != self.request.user:
+        if serializer.instance.author_id != self.request.user.pk:
             raise PermissionDenied("Изменение чужих постов запрещено!")
         serializer.save()
 
@@ -206,4 +332,10 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_destroy(self, instance):
-        instance.delete()
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            if not deleted:  # уже удалён параллельным запросом
+                return
+            # add_comments сдвигает и дату отзыва: она служит
+            # Last-Modified для списка комментариев.
+            Review.objects.filter(pk=instance.review_id).add_comments(-1)
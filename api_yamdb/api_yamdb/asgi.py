@@ -1,6 +1,30 @@
 import os
 
-from django.core.asgi import get_asgi_application
+try:
+    from django.core.asgi import get_asgi_application
+except ImportError:
+    # Django 2.2 не умеет ASGI: WSGI приложение выполняется в пуле потоков.
+    from asgiref.sync import sync_to_async
+    from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+    from django.core.wsgi import get_wsgi_application
+
+    class ThreadPoolInstance(WsgiToAsgiInstance):
+        # Обёртка asgiref выполняет все запросы в одном потоке и при
+        # параллельных запросах отвечает ошибкой.
+        run_wsgi_app = sync_to_async(
+            WsgiToAsgiInstance.__dict__["run_wsgi_app"].func,
+            thread_sensitive=False,
+        )
+
+    class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+        async def __call__(self, scope, receive, send):
+            await ThreadPoolInstance(self.wsgi_application)(
+                scope, receive, send
+            )
+
+    def get_asgi_application():
+        return ThreadPoolWsgiToAsgi(get_wsgi_application())
+
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
 
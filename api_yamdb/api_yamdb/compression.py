@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware с порогом GZIP_MIN_LENGTH байт.
+
+    Короткие ответы (ошибки, токены, 304) почти не сжимаются, а время на
+    сжатие тратят; стандартный порог Django - 200 байт.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.GZIP_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
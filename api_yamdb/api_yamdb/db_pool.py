@@ -0,0 +1,259 @@
+"""Пул соединений PostgreSQL внутри процесса.
+
+В Django 2.2 нет пула: соединение живёт в своём потоке не дольше
+CONN_MAX_AGE и затем закрывается. Пул подключается через
+OPTIONS["connection_factory"]: psycopg2.connect вызывает фабрику, и та
+отдаёт свободное соединение из пула вместо нового. Когда Django закрывает
+соединение, оно возвращается в пул.
+
+Перед повторным использованием соединение, простоявшее дольше
+check_after секунд, проверяется запросом SELECT 1. Число открытых
+соединений ограничено size; когда свободных нет, запрос ждёт до timeout
+секунд и получает OperationalError.
+"""
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+from django.conf import settings
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Счётчики пула; setup - время открытия новых соединений."""
+
+    FIELDS = ("hits", "misses", "waits", "timeouts", "health_failures")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.setup_total = 0.0
+        self.setup_max = 0.0
+
+    def incr(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def connected(self, seconds):
+        with self.lock:
+            self.misses += 1
+            self.setup_total += seconds
+            self.setup_max = max(self.setup_max, seconds)
+
+    def as_dict(self):
+        with self.lock:
+            stats = {field: getattr(self, field) for field in self.FIELDS}
+            stats["setup_total_ms"] = round(self.setup_total * 1000, 2)
+            stats["setup_avg_ms"] = round(
+                self.setup_total * 1000 / self.misses, 2
+            ) if self.misses else 0.0
+            stats["setup_max_ms"] = round(self.setup_max * 1000, 2)
+        return stats
+
+
+class PooledConnection(extensions.connection):
+    """Соединение psycopg2, которое при close() возвращается в пул."""
+
+    pool = None
+    created = 0.0
+    returned = 0.0
+
+    def close(self):
+        if self.pool is None or not self.pool.put(self):
+            super().close()
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений с одной базой."""
+
+    def __init__(self, dsn, stats, size, timeout, check_after, max_lifetime):
+        self.dsn = dsn
+        self.stats = stats
+        self.size = size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_lifetime = max_lifetime
+        self.condition = threading.Condition()
+        self.idle = []
+        self.opened = 0
+        self.pid = os.getpid()
+        self.closed = False
+        # Соединения родителя после fork: их нельзя ни использовать, ни
+        # закрывать, поэтому держим ссылки, чтобы их не закрыл сборщик.
+        self.inherited = []
+
+    def check_fork(self):
+        if self.pid != os.getpid():
+            self.inherited.extend(self.idle)
+            self.idle = []
+            self.opened = 0
+            self.pid = os.getpid()
+
+    def get(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = self.acquire(deadline)
+            if conn is None:
+                return self.connect()
+            if self.is_usable(conn):
+                self.stats.incr("hits")
+                return conn
+            self.discard(conn)
+
+    def acquire(self, deadline):
+        """Свободное соединение или None, если можно открыть новое."""
+        with self.condition:
+            self.check_fork()
+            waited = False
+            while not self.idle and self.opened >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.incr("timeouts")
+                    raise psycopg2.OperationalError(
+                        f"Нет свободных соединений в пуле ({self.size}) "
+                        f"за {self.timeout} с."
+                    )
+                if not waited:
+                    self.stats.incr("waits")
+                    waited = True
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.opened += 1
+            return None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            conn = PooledConnection(self.dsn)
+        except Exception:
+            self.release_slot()
+            raise
+        elapsed = time.perf_counter() - started
+        self.stats.connected(elapsed)
+        logger.debug("Новое соединение с базой за %.2f мс", elapsed * 1000)
+        conn.pool = self
+        conn.created = time.monotonic()
+        return conn
+
+    def is_expired(self, conn):
+        return time.monotonic() - conn.created > self.max_lifetime
+
+    def is_usable(self, conn):
+        if conn.closed or self.is_expired(conn):
+            return False
+        if time.monotonic() - conn.returned < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if (conn.info.transaction_status
+                    != extensions.TRANSACTION_STATUS_IDLE):
+                conn.rollback()
+        except psycopg2.Error:
+            self.stats.incr("health_failures")
+            return False
+        return True
+
+    def put(self, conn):
+        """Возвращает соединение в пул; False - его надо закрыть."""
+        if (self.closed or conn.closed or self.is_expired(conn)
+                or self.pid != os.getpid()):
+            self.release_slot()
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self.release_slot()
+                return False
+        conn.returned = time.monotonic()
+        with self.condition:
+            self.idle.append(conn)
+            self.condition.notify()
+        return True
+
+    def release_slot(self):
+        with self.condition:
+            if self.pid == os.getpid():
+                self.opened -= 1
+            self.condition.notify()
+
+    def discard(self, conn):
+        extensions.connection.close(conn)
+        self.release_slot()
+
+    def clear(self):
+        """Закрывает свободные соединения."""
+        with self.condition:
+            self.check_fork()
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            self.discard(conn)
+
+
+class ConnectionPools:
+    """Фабрика соединений для OPTIONS["connection_factory"].
+
+    Пул заводится на каждую строку подключения (база, пользователь,
+    хост), так что служебные подключения Django к базе postgres не
+    занимают соединения основной базы.
+    """
+
+    def __init__(self, size, timeout=10, check_after=5, max_lifetime=600):
+        self.options = {
+            "size": size,
+            "timeout": timeout,
+            "check_after": check_after,
+            "max_lifetime": max_lifetime,
+        }
+        self.stats = PoolStats()
+        self.pools = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __call__(self, dsn, async_=0):
+        if self.closed or async_:
+            return extensions.connection(dsn, async_)
+        pool = self.pools.get(dsn)
+        if pool is None:
+            with self.lock:
+                pool = self.pools.setdefault(
+                    dsn, ConnectionPool(dsn, self.stats, **self.options)
+                )
+        return pool.get()
+
+    def clear(self):
+        for pool in list(self.pools.values()):
+            pool.clear()
+
+    def close(self):
+        """Закрывает пулы; дальше соединения открываются без пула."""
+        self.closed = True
+        for pool in list(self.pools.values()):
+            pool.closed = True
+        self.clear()
+
+
+def get_pools():
+    """Фабрики пулов из настроек по псевдонимам баз."""
+    return {
+        alias: database["OPTIONS"]["connection_factory"]
+        for alias, database in settings.DATABASES.items()
+        if isinstance(
+            database.get("OPTIONS", {}).get("connection_factory"),
+            ConnectionPools,
+        )
+    }
+
+
+def pool_stats():
+    """Счётчики пулов по псевдонимам баз."""
+    return {
+        alias: pools.stats.as_dict() for alias, pools in get_pools().items()
+    }
@@ -0,0 +1,95 @@
+"""Чтение с реплик, запись в основную базу.
+
+ReplicaMiddleware решает для каждого запроса, откуда читать: запросы
+безопасными методами читают с одной из реплик DATABASE_REPLICAS,
+остальные работают только с default. После успешной записи клиент
+REPLICA_STICKY_SECONDS секунд читает из default, чтобы видеть свои
+изменения, пока реплики догоняют. Вне запросов (команды управления,
+миграции) всё идёт в default, как и внутри read_from_primary.
+"""
+import hashlib
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+state = threading.local()
+
+
+def get_read_alias():
+    return getattr(state, "read_alias", PRIMARY)
+
+
+@contextmanager
+def read_from_primary():
+    """Чтение из default внутри блока, например при заполнении кэша."""
+    previous = getattr(state, "read_alias", None)
+    state.read_alias = PRIMARY
+    try:
+        yield
+    finally:
+        if previous is None:
+            del state.read_alias
+        else:
+            state.read_alias = previous
+
+
+def sticky_key(request):
+    """Клиент определяется по токену, анонимный - по адресу."""
+    identity = (
+        request.META.get("HTTP_AUTHORIZATION")
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    digest = hashlib.md5(identity.encode()).hexdigest()
+    return f"db:sticky:{digest}"
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return self.get_response(request)
+        safe = request.method in SAFE_METHODS
+        key = sticky_key(request)
+        if safe and not cache.get(key):
+            # Одна реплика на весь запрос: у разных реплик разное отставание.
+            state.read_alias = random.choice(replicas)
+        else:
+            state.read_alias = PRIMARY
+        try:
+            response = self.get_response(request)
+        finally:
+            del state.read_alias
+        if not safe and response.status_code < 400:
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему от основной базы.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,219 @@
+"""Профилирование запросов: Server-Timing, строка лога и выборочный cProfile.
+
+ProfilingMiddleware подключается только при PROFILING_ENABLED: иначе
+Django исключает его из цепочки (MiddlewareNotUsed), и запросы за него
+ничего не платят. Включённый, он замеряет каждый запрос:
+
+- db - количество и время SQL запросов (execute_wrapper на всех базах);
+- auth - аутентификация, права и троттлинг DRF (APIView.initial);
+- serialize - сериализаторы DRF и RowSerializer из api.rows;
+- view - представление целиком, вместе с db, auth и serialize;
+- render - рендеринг ответа;
+- total - весь запрос вместе с middleware, стоящими ниже.
+
+Итог уходит в заголовок Server-Timing и JSON строкой в логгер
+api_yamdb.profiling. Доля PROFILING_SAMPLE_RATE запросов и запросы с
+заголовком X-Profile, равным PROFILING_TOKEN, дополнительно выполняются
+под cProfile, статистика пишется в PROFILING_DIR (pstats, snakeviz).
+Запросы, которые потоковый ответ (выгрузка) делает уже после выхода из
+middleware, в замер не попадают.
+"""
+import cProfile
+import functools
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("db", "auth", "serialize", "view", "render", "total")
+PROFILE_HEADER = "HTTP_X_PROFILE"
+
+state = threading.local()
+install_lock = threading.Lock()
+installed = False
+
+
+class RequestProfile:
+    """Замеры одного запроса, в секундах."""
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+        self.depth = {}
+        self.view_started = None
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, name):
+        # Вложенные замеры одного вида (сериализатор expand внутри
+        # сериализатора) не учитываются повторно.
+        depth = self.depth.get(name, 0)
+        self.depth[name] = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.depth[name] = depth
+            if not depth:
+                self.add(name, time.perf_counter() - started)
+
+    def finish_view(self):
+        if self.view_started is not None and "view" not in self.durations:
+            self.add("view", time.perf_counter() - self.view_started)
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: время и количество SQL запросов."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add("db", time.perf_counter() - started)
+
+    def milliseconds(self):
+        return {
+            name: round(self.durations[name] * 1000, 3)
+            for name in METRICS
+            if name in self.durations
+        }
+
+    def server_timing(self):
+        metrics = []
+        for name, value in self.milliseconds().items():
+            metric = f"{name};dur={value:.1f}"
+            if name == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+def timed(function, name):
+    """Обёртка, замеряющая function только внутри профилируемого запроса."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        profile = getattr(state, "profile", None)
+        if profile is None:
+            return function(*args, **kwargs)
+        with profile.timer(name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def install():
+    """Расставляет точки замера auth и serialize, один раз на процесс."""
+    from api.rows import RowSerializer
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    global installed
+    with install_lock:
+        if installed:
+            return
+        APIView.initial = timed(APIView.initial, "auth")
+        # Serializer.data и ListSerializer.data вызывают BaseSerializer.data.
+        BaseSerializer.data = property(
+            timed(BaseSerializer.data.fget, "serialize")
+        )
+        RowSerializer.to_representation = timed(
+            RowSerializer.to_representation, "serialize"
+        )
+        installed = True
+
+
+def dump_name(request, profile):
+    path = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_")[:80]
+    return "{}-{}-{}-{:.0f}ms-{}.prof".format(
+        time.strftime("%Y%m%d-%H%M%S"),
+        request.method,
+        path or "root",
+        profile.durations["total"] * 1000,
+        uuid.uuid4().hex[:8],
+    )
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def wants_cprofile(self, request):
+        token = settings.PROFILING_TOKEN
+        header = request.META.get(PROFILE_HEADER)
+        if token and header:
+            return hmac.compare_digest(header, token)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        profile = state.profile = RequestProfile()
+        profiler = cProfile.Profile() if self.wants_cprofile(request) else None
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile)
+                    )
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            del state.profile
+        profile.finish_view()
+        profile.add("total", time.perf_counter() - started)
+
+        dump = None
+        if profiler is not None:
+            os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+            dump = dump_name(request, profile)
+            profiler.dump_stats(os.path.join(settings.PROFILING_DIR, dump))
+        response["Server-Timing"] = profile.server_timing()
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.queries,
+            "ms": profile.milliseconds(),
+            "profile": dump,
+        }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state.profile.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        profile = state.profile
+        profile.finish_view()
+        render = response.render
+
+        def timed_render():
+            try:
+                with profile.timer("render"):
+                    return render()
+            finally:
+                del response.render
+
+        response.render = timed_render
+        return response
@@ -32,6 +32,9 @@ AUTH_USER_MODEL = "reviews.CustomUser"  # Кастомная модель по 
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api_yamdb.profiling.ProfilingMiddleware",
+    "api_yamdb.compression.ThresholdGZipMiddleware",
+    "api_yamdb.db_router.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -72,9 +75,113 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="postgres"),
         "HOST": os.getenv("DB_HOST", default="db"),
         "PORT": os.getenv("DB_PORT", default="5432"),
+        # С пулом соединение возвращается в него после каждого запроса;
+        # без пула (DB_POOL_SIZE=0) живёт в потоке CONN_MAX_AGE секунд.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", default=0)),
+        "OPTIONS": {},
     }
 }
 
+# Реплики для чтения (api_yamdb.db_router): хосты PostgreSQL в виде
+# host[:port] или файлы SQLite через запятую. Запись всегда идёт в default.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", default="").split(",")), start=1
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "OPTIONS": {},
+        "TEST": {"MIRROR": "default"},
+    }
+    if DATABASES[alias]["ENGINE"] == "django.db.backends.sqlite3":
+        DATABASES[alias]["NAME"] = replica
+    else:
+        host, _, port = replica.partition(":")
+        DATABASES[alias]["HOST"] = host
+        DATABASES[alias]["PORT"] = port or DATABASES[alias]["PORT"]
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["api_yamdb.db_router.PrimaryReplicaRouter"]
+# Сколько секунд после записи клиент читает из default.
+REPLICA_STICKY_SECONDS = int(
+    os.getenv("DB_REPLICA_STICKY_SECONDS", default=5)
+)
+
+# Пул соединений PostgreSQL на процесс (api_yamdb.db_pool).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", default=4))
+for database in DATABASES.values():
+    if (
+        DB_POOL_SIZE
+        and database["ENGINE"] == "django.db.backends.postgresql"
+    ):
+        from .db_pool import ConnectionPools
+
+        database["OPTIONS"]["connection_factory"] = ConnectionPools(
+            size=DB_POOL_SIZE,
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", default=10)),
+            check_after=float(os.getenv("DB_POOL_CHECK_AFTER", default=5)),
+            max_lifetime=float(
+                os.getenv("DB_POOL_MAX_LIFETIME", default=600)
+            ),
+        )
+
+# Бэкенд кэша и расположение по умолчанию. memcached - единственный с
+# атомарными incr и add между процессами (нужен python-memcached).
+CACHE_BACKENDS = {
+    "locmem": (
+        "django.core.cache.backends.locmem.LocMemCache", "yamdb"
+    ),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        os.path.join(BASE_DIR, "cache"),
+    ),
+    "memcached": (
+        "django.core.cache.backends.memcached.MemcachedCache",
+        "127.0.0.1:11211",
+    ),
+}
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", default="locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION", default=CACHE_BACKENDS[CACHE_BACKEND][1]
+        ),
+    }
+}
+# Для memcached OPTIONS уходят в конструктор клиента, размер же
+# ограничивает сам сервер.
+if CACHE_BACKEND != "memcached":
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", default=10000)),
+    }
+
+# Кэш ответов каталога (жанры, категории, произведения); 0 - выключен.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", default=300))
+
+# Сколько вложенных отзывов или комментариев отдаётся на родителя (?expand=).
+EXPAND_LIMIT = int(os.getenv("EXPAND_LIMIT", default=5))
+
+# Поиск по названиям: trigram - pg_trgm на PostgreSQL, fts5 - SQLite,
+# basic - icontains без индекса. По умолчанию выбирается по движку БД.
+SEARCH_BACKENDS = {
+    "basic": "api.search.BasicSearch",
+    "trigram": "api.search.TrigramSearch",
+    "fts5": "api.search.FTS5Search",
+}
+
+SEARCH_BACKEND = os.getenv(
+    "SEARCH_BACKEND",
+    default={
+        "django.db.backends.postgresql": "trigram",
+        "django.db.backends.sqlite3": "fts5",
+    }.get(DATABASES["default"]["ENGINE"], "basic"),
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,19 +220,64 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # MessagePack только по Accept: application/msgpack или ?format=msgpack.
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.MessagePackRenderer",
+    ),
+}
+
+# Наибольший limit страницы списков; больший запрос обрезается.
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", default=1000))
+
+# Ответы короче порога (в байтах) отдаются без gzip.
+GZIP_MIN_LENGTH = int(os.getenv("GZIP_MIN_LENGTH", default=1024))
+
+# Профилирование запросов (api_yamdb.profiling): Server-Timing и строка
+# лога с временем базы, сериализации и рендеринга. Выключенное
+# middleware исключается из цепочки.
+PROFILING_ENABLED = (
+    os.getenv("PROFILING_ENABLED", default="false").lower() == "true"
+)
+# Доля запросов под cProfile; запрос с заголовком X-Profile, равным
+# PROFILING_TOKEN, профилируется всегда. Дампы .prof - в PROFILING_DIR.
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", default=0))
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", default="")
+PROFILING_DIR = os.getenv(
+    "PROFILING_DIR", default=os.path.join(BASE_DIR, "profiles")
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api_yamdb.profiling": {"handlers": ["console"], "level": "INFO"},
+    },
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=365),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=365),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_USER_CLASS": "api.authentication.ClaimsUser",
 }
 
+# Сколько проверенных токенов держать в LRU процесса.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", default=1024))
+# Срок кэширования версии токенов пользователя, в секундах.
+AUTH_TOKEN_VERSION_TIMEOUT = int(
+    os.getenv("AUTH_TOKEN_VERSION_TIMEOUT", default=60)
+)
+
 EMAIL_HOST = "smtp.yandex.ru"
 EMAIL_PORT = 465
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")  # yandex login
@@ -134,4 +286,11 @@ EMAIL_USE_TLS = False
 EMAIL_USE_SSL = True
 SERVER_EMAIL = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Письма уходят через очередь OutboxEmail и команду send_outbox; для
+# проверки без сети подходят locmem и file.
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = os.getenv(
+    "EMAIL_FILE_PATH", default=os.path.join(BASE_DIR, "sent_emails")
+)
@@ -0,0 +1,100 @@
+"""Настройки gunicorn: режим воркеров, предзагрузка и перезапуск.
+
+Файл подхватывается gunicorn из рабочего каталога автоматически.
+Режим выбирается переменной SERVER_MODE:
+
+- gthread (по умолчанию) - процессы с пулом потоков, WSGI;
+- asgi - воркеры uvicorn поверх api_yamdb.asgi;
+- sync - один поток на процесс, прежнее поведение (для сравнения).
+"""
+import gc
+import multiprocessing
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "gthread")
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "asgi": "uvicorn.workers.UvicornWorker",
+}
+if SERVER_MODE not in WORKER_CLASSES:
+    raise RuntimeError(
+        f"Неизвестный SERVER_MODE={SERVER_MODE}, "
+        f"ожидается одно из: {', '.join(WORKER_CLASSES)}"
+    )
+
+wsgi_app = (
+    "api_yamdb.asgi:application" if SERVER_MODE == "asgi"
+    else "api_yamdb.wsgi:application"
+)
+worker_class = WORKER_CLASSES[SERVER_MODE]
+bind = os.getenv("GUNICORN_BIND", "0:8000")
+# Версии кэша ответов, single-flight, липкость к основной базе и версии
+# токенов живут в кэше Django. С locmem у каждого процесса он свой, а
+# у file incr и add не атомарны между процессами: воркеры теряли бы
+# увеличения версий и одновременно захватывали блокировку single-flight.
+# Поэтому несколько воркеров допускаются только с memcached.
+SHARED_CACHE_BACKENDS = ("memcached",)
+shared_cache = os.getenv("CACHE_BACKEND", "locmem") in SHARED_CACHE_BACKENDS
+# 0 - по числу процессоров при общем кэше (запросы к базе освобождают
+# GIL, поэтому процессов берём с запасом), иначе один процесс.
+workers = int(os.getenv("GUNICORN_WORKERS", 0)) or (
+    multiprocessing.cpu_count() * 2 + 1 if shared_cache else 1
+)
+if workers > 1 and not shared_cache:
+    raise RuntimeError(
+        f"GUNICORN_WORKERS={workers} требует общего кэша: задайте "
+        f"CACHE_BACKEND одно из: {', '.join(SHARED_CACHE_BACKENDS)}"
+    )
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+if SERVER_MODE == "sync":
+    threads = 1
+
+# Приложение импортируется один раз в мастере, воркеры получают его
+# через fork и делят страницы памяти, пока не начнут их менять.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Воркер перезапускается после стольких запросов (со случайным сдвигом,
+# чтобы не все сразу), это ограничивает рост памяти. Текущие запросы
+# дорабатывают в пределах graceful_timeout.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Сердцебиение воркеров в tmpfs: в контейнере /tmp может быть на диске.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG")
+errorlog = "-"
+
+
+def when_ready(server):
+    """Готовит мастер к fork после предзагрузки приложения.
+
+    Соединения с базой не должны достаться воркерам по наследству, а
+    объекты, созданные при импорте, замораживаются: сборщик мусора не
+    трогает их счётчики, и страницы остаются общими после fork.
+    """
+    if preload_app:
+        from django.db import connections
+
+        from api_yamdb.db_pool import get_pools
+
+        connections.close_all()
+        for pools in get_pools().values():
+            pools.clear()
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    """Пишет в лог счётчики пула соединений воркера."""
+    from api_yamdb.db_pool import pool_stats
+
+    for alias, stats in pool_stats().items():
+        server.log.info(
+            "db pool %s pid=%s %s", alias, worker.pid,
+            " ".join(f"{field}={value}" for field, value in stats.items()),
+        )
@@ -0,0 +1,118 @@
+"""Общие помощники массовой загрузки данных для команд управления."""
+import io
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+@contextmanager
+def keep_dates(model):
+    """Отключает auto_now_add, чтобы сохранить даты из источника."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def stamp_auto_now(model, objs):
+    """Проставляет поля auto_now: bulk_update не вызывает pre_save.
+
+    Возвращает имена полей, чтобы добавить их к обновляемым.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    ]
+    for obj in objs:
+        for field in fields:
+            field.pre_save(obj, add=False)
+    return [field.attname for field in fields]
+
+
+def reset_sequences(models):
+    """Сдвигает автоинкремент за явно вставленные id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY: NULL и экранирование."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_values(model, rows):
+    """COPY FROM STDIN строк со значениями всех колонок модели по порядку."""
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    for values in rows:
+        buffer.write("\t".join(copy_value(value) for value in values))
+        buffer.write("\n")
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def copy_objects(model, objs):
+    """Вставка пачки объектов через COPY (только PostgreSQL)."""
+    fields = model._meta.concrete_fields
+    copy_values(model, (
+        [
+            field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+            for field in fields
+        ]
+        for obj in objs
+    ))
+
+
+def copy_rows(model, rows):
+    """Вставка пачки словарей attname -> значение через COPY.
+
+    Объекты моделей не создаются, поэтому значения должны быть готовы
+    для базы: числа, строки, aware datetime. Незаданные поля получают
+    то же, что при сохранении нового объекта (default, auto_now).
+    """
+    fields = model._meta.concrete_fields
+    template = model()
+    defaults = [
+        (field.attname, field.get_db_prep_save(
+            field.pre_save(template, add=True), connection
+        ))
+        for field in fields
+    ]
+    copy_values(model, (
+        [values.get(attname, default) for attname, default in defaults]
+        for values in rows
+    ))
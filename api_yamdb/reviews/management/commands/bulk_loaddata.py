@@ -0,0 +1,213 @@
+import json
+import os
+import tempfile
+import time
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from reviews.management.bulk import batched, keep_dates, reset_sequences
+from reviews.models import Review, Title
+from reviews.signals import data_imported
+
+# Порядок загрузки по зависимостям внешних ключей.
+MODEL_ORDER = (
+    "reviews.customuser",
+    "reviews.category",
+    "reviews.genre",
+    "reviews.title",
+    "reviews.genretitle",
+    "reviews.review",
+    "reviews.comment",
+)
+
+BATCH_SIZE = 2000
+READ_SIZE = 1 << 16
+
+
+class JsonArrayReader:
+    """Потоково отдаёт объекты из JSON-массива верхнего уровня.
+
+    В памяти держится только буфер чтения и текущий объект, а не весь
+    документ, как у ``json.load``.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.stream.read(self.read_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def next_char(self, skip=""):
+        """Первый символ после пробелов и символов из skip."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and (self.buffer[self.position].isspace()
+                     or self.buffer[self.position] in skip)
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                raise CommandError("Неожиданный конец файла фикстуры.")
+            self.fill()
+
+    def decode(self):
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise CommandError("Некорректный JSON в фикстуре.")
+                self.fill()
+                continue
+            if end < len(self.buffer) or self.eof:
+                self.position = end
+                return obj
+            self.fill()  # объект мог оборваться на границе буфера
+
+    def __iter__(self):
+        if self.next_char() != "[":
+            raise CommandError("Фикстура должна быть JSON-массивом.")
+        self.position += 1
+        while self.next_char(skip=",") != "]":
+            yield self.decode()
+
+
+class Command(BaseCommand):
+    help = "Потоковая загрузка фикстуры пачками через bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixture", help="Путь к JSON фикстуре.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество объектов в одной пачке вставки.",
+        )
+        parser.add_argument(
+            "--ignore-conflicts",
+            action="store_true",
+            help="Пропускать объекты, которые уже есть в базе.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["fixture"]
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден.")
+        self.batch_size = options["batch_size"]
+        self.ignore_conflicts = options["ignore_conflicts"]
+        started = time.monotonic()
+
+        with tempfile.TemporaryDirectory() as spool_dir:
+            counts = self.spool(path, spool_dir)
+            total = 0
+            try:
+                with transaction.atomic():
+                    for label in MODEL_ORDER:
+                        if counts.get(label):
+                            spool = os.path.join(spool_dir, label)
+                            total += self.load_model(label, spool)
+                    reset_sequences(
+                        apps.get_model(label) for label in MODEL_ORDER
+                    )
+                    Title.objects.filter(
+                        pk__in=Title.objects.stale_scores().values("pk")
+                    ).recount_scores()
+                    Review.objects.filter(
+                        pk__in=Review.objects.stale_comments().values("pk")
+                    ).recount_comments()
+            except IntegrityError as error:
+                raise CommandError(
+                    f"Ошибка вставки: {error}. Для загрузки поверх "
+                    "существующих данных используйте --ignore-conflicts."
+                )
+        data_imported.send(sender=self.__class__)
+
+        skipped = {
+            label: count for label, count in counts.items()
+            if label not in MODEL_ORDER
+        }
+        if skipped:
+            self.stdout.write(
+                "Пропущены модели вне каталога: "
+                + ", ".join(f"{k} ({v})" for k, v in sorted(skipped.items()))
+            )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено {total} объектов за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-6):.0f} объектов/с)."
+        ))
+
+    def spool(self, path, spool_dir):
+        """Раскладывает объекты фикстуры по файлам моделей (JSON Lines)."""
+        files = {}
+        counts = {}
+        try:
+            with open(path, "r", encoding="utf-8") as stream:
+                for obj in JsonArrayReader(stream):
+                    label = str(obj.get("model", "")).lower()
+                    counts[label] = counts.get(label, 0) + 1
+                    if label not in MODEL_ORDER:
+                        continue
+                    if label not in files:
+                        files[label] = open(
+                            os.path.join(spool_dir, label), "w",
+                            encoding="utf-8",
+                        )
+                    files[label].write(json.dumps(obj) + "\n")
+        finally:
+            for spool in files.values():
+                spool.close()
+        return counts
+
+    def load_model(self, label, spool):
+        model = apps.get_model(label)
+        loaded = 0
+        started = time.monotonic()
+        with open(spool, "r", encoding="utf-8") as lines, keep_dates(model):
+            objects = (json.loads(line) for line in lines)
+            for batch in batched(objects, self.batch_size):
+                deserialized = list(serializers.deserialize(
+                    "python", batch, ignorenonexistent=True
+                ))
+                model.objects.bulk_create(
+                    [item.object for item in deserialized],
+                    ignore_conflicts=self.ignore_conflicts,
+                )
+                self.save_m2m(model, deserialized)
+                loaded += len(deserialized)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{label}: {loaded} объектов, "
+                    f"{loaded / max(elapsed, 1e-6):.0f} объектов/с"
+                )
+        return loaded
+
+    def save_m2m(self, model, deserialized):
+        """Связи many-to-many пачки одной вставкой на поле."""
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            links = [
+                through(**{source: item.object.pk, target: pk})
+                for item in deserialized
+                for pk in (item.m2m_data or {}).get(field.name, ())
+            ]
+            if links:
+                through.objects.bulk_create(
+                    links, ignore_conflicts=self.ignore_conflicts
+                )
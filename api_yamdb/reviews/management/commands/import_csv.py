@@ -1,8 +1,32 @@
 import csv
+import datetime as dt
+import hashlib
+import os
+import time
 
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.management.bulk import (batched, copy_objects, keep_dates,
+                                     reset_sequences, stamp_auto_now)
 from reviews.models import (Category, Comment, CustomUser, Genre, GenreTitle,
-                            Review, Title)
+                            ImportCheckpoint, Review, Title)
+from reviews.signals import data_imported
+
+# Файл, модель и колонки с внешними ключами: колонка -> модель-цель.
+# Порядок задаёт зависимости: ссылки разрешаются по уже загруженным id.
+SOURCES = (
+    ("users.csv", CustomUser, {}),
+    ("category.csv", Category, {}),
+    ("genre.csv", Genre, {}),
+    ("titles.csv", Title, {"category": Category}),
+    ("genre_title.csv", GenreTitle, {"title_id": Title, "genre_id": Genre}),
+    ("review.csv", Review, {"title_id": Title, "author": CustomUser}),
+    ("comments.csv", Comment, {"review_id": Review, "author": CustomUser}),
+)
 
 MODELS = (
     Category,
@@ -14,96 +38,312 @@ MODELS = (
     CustomUser,
 )
 
+BATCH_SIZE = 5000
+
+
+def clear_order():
+    """Модели для очистки: сначала все, кто ссылается на следующих."""
+    models = [Comment, Review, GenreTitle, Title.genre.through, Title,
+              Genre, Category]
+    # Связи пользователей вне каталога: группы, права, журнал админки.
+    models += [
+        field.remote_field.through
+        for field in CustomUser._meta.local_many_to_many
+    ]
+    models += [
+        relation.related_model
+        for relation in CustomUser._meta.related_objects
+        if relation.related_model not in models
+    ]
+    return models + [CustomUser]
+
+
+def fingerprint(values):
+    """Короткий отпечаток набора значений строки."""
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append("\x00")
+            continue
+        if isinstance(value, dt.datetime):
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.utc)
+            value = value.astimezone(timezone.utc).isoformat()
+        parts.append(str(value))
+    return hashlib.blake2b(
+        "\x1f".join(parts).encode("utf-8"), digest_size=8
+    ).digest()
+
+
+def file_checksum(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class Command(BaseCommand):
     help = "Загрузка CSV файлов."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data-dir",
+            default=os.path.join(settings.BASE_DIR, "static", "data"),
+            help="Каталог с CSV файлами.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество строк в одной пачке вставки.",
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help="Очистить таблицы через TRUNCATE ... CASCADE "
+                 "(на PostgreSQL) вместо удаления через ORM.",
+        )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help="Инкрементальная синхронизация: изменяются только "
+                 "отличающиеся строки, прогресс сохраняется для "
+                 "возобновления после сбоя.",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Не использовать COPY даже на PostgreSQL.",
+        )
+
     def handle(self, *args, **options):
-        if Title.objects.count() > 1:
-            for model in MODELS:
-                model.objects.all().delete()
-
-        with open("static/data/users.csv", "r") as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                user_obj, created = CustomUser.objects.update_or_create(
-                    id=row["id"],
-                    username=row["username"],
-                    email=row["email"],
-                    role=row["role"],
-                )
+        self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("--batch-size должен быть больше нуля.")
+        self.use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        for filename, _, _ in SOURCES:
+            path = os.path.join(options["data_dir"], filename)
+            if not os.path.exists(path):
+                raise CommandError(f"Файл {path} не найден.")
 
-        with open("static/data/category.csv", "r") as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                category_obj, created = Category.objects.update_or_create(
-                    id=row["id"],
-                    name=row["name"],
-                    slug=row["slug"],
-                )
+        if options["delta"] and options["truncate"]:
+            raise CommandError("--delta и --truncate несовместимы.")
 
-        with open(r"static/data/genre.csv", "r", encoding="utf-8") as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                genre_obj, created = Genre.objects.update_or_create(
-                    id=row["id"], name=row["name"], slug=row["slug"]
-                )
+        self.pk_maps = {}
+        started = time.monotonic()
+        total = 0
+        if options["delta"]:
+            for filename, model, foreign_keys in SOURCES:
+                path = os.path.join(options["data_dir"], filename)
+                total += self.sync_file(path, model, foreign_keys)
+            reset_sequences(model for _, model, _ in SOURCES)
+            Title.objects.filter(
+                pk__in=Title.objects.stale_scores().values("pk")
+            ).recount_scores()
+            Review.objects.filter(
+                pk__in=Review.objects.stale_comments().values("pk")
+            ).recount_comments()
+            ImportCheckpoint.objects.filter(
+                source__in=[filename for filename, _, _ in SOURCES]
+            ).delete()
+        else:
+            self.clear(options["truncate"])
+            for filename, model, foreign_keys in SOURCES:
+                path = os.path.join(options["data_dir"], filename)
+                total += self.load_file(path, model, foreign_keys)
+            reset_sequences(model for _, model, _ in SOURCES)
+            Title.objects.recount_scores()
+            Review.objects.recount_comments()
+        data_imported.send(sender=self.__class__)
 
-        with open(
-            r"static/data/titles.csv", "r", encoding="utf-8"
-        ) as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                category = Category.objects.get(id=row["category"])
-                titles_obj, created = Title.objects.update_or_create(
-                    id=row["id"],
-                    name=row["name"],
-                    year=row["year"],
-                    category=category,
-                )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Загрузка успешно завершена! {total} строк за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-6):.0f} строк/с)."
+        ))
 
-        with open(
-            r"static/data/genre_title.csv", "r", encoding="utf-8"
-        ) as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                title = Title.objects.get(id=row["title_id"])
-                genre = Genre.objects.get(id=row["genre_id"])
-                genre_title_obj, created = GenreTitle.objects.update_or_create(
-                    id=row["id"],
-                    genre=genre,
-                    title=title,
-                )
+    def clear(self, truncate):
+        tables = [model._meta.db_table for model in MODELS]
+        tables += [
+            field.remote_field.through._meta.db_table
+            for model in MODELS
+            for field in model._meta.local_many_to_many
+        ]
+        if truncate:
+            statements = connection.ops.sql_flush(
+                no_style(), tables, (), allow_cascade=True
+            )
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+            return
+        # Таблицы очищаются целиком одним DELETE каждая, от зависимых к
+        # родителям, мимо сборщика Django: он выбрал бы строки ради
+        # сигналов удаления. Кэши и счётчики сбрасывает data_imported.
+        with transaction.atomic():
+            for model in clear_order():
+                queryset = model._base_manager.all()
+                queryset._raw_delete(queryset.db)
 
-        with open(
-            r"static/data/review.csv", "r", encoding="utf-8"
-        ) as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                title = Title.objects.get(id=row["title_id"])
-                author = CustomUser.objects.get(pk=row["author"])
-                review_obj, created = Review.objects.update_or_create(
-                    id=row["id"],
-                    title=title,
-                    text=row["text"],
-                    author=author,
-                    score=row["score"],
-                    pub_date=row["pub_date"],
-                )
+    def get_columns(self, model, fieldnames):
+        """Пары (колонка, поле модели); лишние колонки пропускаются."""
+        columns = []
+        for column in fieldnames:
+            try:
+                columns.append((column, model._meta.get_field(column)))
+            except FieldDoesNotExist:
+                continue
+        return columns
+
+    def read_rows(self, path, model, foreign_keys, stats):
+        """Потоково превращает строки CSV в значения полей модели."""
+        with open(path, "r", encoding="utf-8", newline="") as csv_file:
+            reader = csv.DictReader(csv_file, delimiter=",")
+            columns = self.get_columns(model, reader.fieldnames)
+            for row in reader:
+                values = self.convert_row(row, columns, foreign_keys)
+                if values is None:
+                    stats["skipped"] += 1
+                    continue
+                yield row[model._meta.pk.attname], values
+
+    def convert_row(self, row, columns, foreign_keys):
+        """Значения полей строки; None, если ссылка не найдена."""
+        values = {}
+        for column, field in columns:
+            raw = row[column]
+            if column in foreign_keys:
+                # Ссылки разрешаются по словарю id -> pk без запросов.
+                pk = self.pk_maps[foreign_keys[column]].get(raw)
+                if pk is None and not field.null:
+                    return None
+                values[field.attname] = pk
+            elif field.primary_key:
+                values[field.attname] = int(raw)
+            else:
+                values[field.attname] = field.to_python(raw)
+        return values
 
-        with open(
-            r"static/data/comments.csv", "r", encoding="utf-8"
-        ) as csv_file:
-            data = csv.DictReader(csv_file, delimiter=",")
-            for row in data:
-                review = Review.objects.get(id=row["review_id"])
-                author = CustomUser.objects.get(id=row["author"])
-                comment_obj, created = Comment.objects.update_or_create(
-                    id=row["id"],
-                    review=review,
-                    text=row["text"],
-                    author=author,
-                    pub_date=row["pub_date"],
+    def load_file(self, path, model, foreign_keys):
+        name = os.path.basename(path)
+        pk_map = self.pk_maps.setdefault(model, {})
+        stats = {"rows": 0, "skipped": 0}
+        started = time.monotonic()
+        rows = self.read_rows(path, model, foreign_keys, stats)
+        with transaction.atomic(), keep_dates(model):
+            for batch in batched(rows, self.batch_size):
+                objs = [model(**values) for _, values in batch]
+                if self.use_copy:
+                    copy_objects(model, objs)
+                else:
+                    model.objects.bulk_create(objs, batch_size=len(objs))
+                pk_map.update((key, obj.pk) for (key, _), obj in zip(
+                    batch, objs
+                ))
+                stats["rows"] += len(objs)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{name}: {stats['rows']} строк, "
+                    f"{stats['rows'] / max(elapsed, 1e-6):.0f} строк/с"
                 )
+        if stats["skipped"]:
+            self.stderr.write(
+                f"{name}: пропущено {stats['skipped']} строк "
+                "со ссылками на несуществующие объекты."
+            )
+        return stats["rows"]
+
+    def get_checkpoint(self, name, checksum):
+        """Контрольная точка файла; сбрасывается, если файл изменился."""
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=name, defaults={"checksum": checksum}
+        )
+        if checkpoint.checksum != checksum:
+            checkpoint.checksum = checksum
+            checkpoint.position = 0
+            checkpoint.finished = False
+            checkpoint.save()
+        return checkpoint
+
+    def sync_file(self, path, model, foreign_keys):
+        """Применяет к таблице только отличия от CSV файла.
+
+        Каждая пачка фиксируется вместе с контрольной точкой, поэтому
+        прерванный запуск продолжает с первой необработанной строки.
+        Строки, которых нет в файле, удаляются: итог совпадает с полной
+        загрузкой.
+        """
+        name = os.path.basename(path)
+        pk_map = self.pk_maps.setdefault(model, {})
+        checkpoint = self.get_checkpoint(name, file_checksum(path))
+        if checkpoint.finished:
+            pk_map.update(
+                (str(pk), pk)
+                for pk in model.objects.values_list("pk", flat=True)
+                .iterator(chunk_size=self.batch_size)
+            )
+            self.stdout.write(f"{name}: уже синхронизирован, пропуск.")
+            return 0
+
+        with open(path, "r", encoding="utf-8", newline="") as csv_file:
+            header = next(csv.reader(csv_file), [])
+        pk_name = model._meta.pk.attname
+        fields = [
+            field for _, field in self.get_columns(model, header)
+            if not field.primary_key
+        ]
+        attnames = [field.attname for field in fields]
+        stored = {
+            row[0]: fingerprint(row[1:])
+            for row in model.objects.values_list(pk_name, *attnames)
+            .order_by().iterator(chunk_size=self.batch_size)
+        }
+
+        stats = {"rows": 0, "skipped": 0, "inserted": 0, "updated": 0}
+        rows = self.read_rows(path, model, foreign_keys, stats)
+        for batch in batched(rows, self.batch_size):
+            inserts, updates = [], []
+            for key, values in batch:
+                pk = values[pk_name]
+                pk_map[key] = pk
+                digest = stored.pop(pk, None)
+                stats["rows"] += 1
+                if stats["rows"] <= checkpoint.position:
+                    continue  # применено в прерванном запуске
+                if digest is None:
+                    inserts.append(model(**values))
+                elif digest != fingerprint(
+                    values[attname] for attname in attnames
+                ):
+                    updates.append(model(**values))
+            with transaction.atomic(), keep_dates(model):
+                model.objects.bulk_create(inserts)
+                if updates:
+                    model.objects.bulk_update(
+                        updates, attnames + stamp_auto_now(model, updates)
+                    )
+                checkpoint.position = max(checkpoint.position, stats["rows"])
+                checkpoint.save(update_fields=["position", "updated"])
+            stats["inserted"] += len(inserts)
+            stats["updated"] += len(updates)
+
+        with transaction.atomic():
+            for chunk in batched(stored, self.batch_size):
+                model.objects.filter(pk__in=chunk).delete()
+            checkpoint.finished = True
+            checkpoint.save(update_fields=["finished", "updated"])
 
-        self.stdout.write(self.style.SUCCESS("Загрузка успешно завершена!"))
+        self.stdout.write(
+            f"{name}: добавлено {stats['inserted']}, "
+            f"изменено {stats['updated']}, удалено {len(stored)}, "
+            f"всего строк {stats['rows']}"
+        )
+        if stats["skipped"]:
+            self.stderr.write(
+                f"{name}: пропущено {stats['skipped']} строк "
+                "со ссылками на несуществующие объекты."
+            )
+        return stats["inserted"] + stats["updated"] + len(stored)
@@ -0,0 +1,85 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from reviews.models import Review, Title
+from reviews.signals import data_imported
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Пересчёт счётчиков рейтинга произведений порциями."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Количество произведений в одной транзакции.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать расхождения, ничего не записывая.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Блокировка строк произведений не даёт параллельной записи
+                # отзыва применить дельту поверх ещё не сохранённой суммы.
+                titles = list(
+                    Title.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only("pk", "score_sum", "review_count")[:chunk_size]
+                )
+                if not titles:
+                    break
+                last_pk = titles[-1].pk
+                totals = {
+                    row["title"]: row
+                    for row in Review.objects.filter(
+                        title__in=[title.pk for title in titles]
+                    )
+                    .order_by()
+                    .values("title")
+                    .annotate(score_sum=Sum("score"), review_count=Count("pk"))
+                }
+                stale = []
+                now = timezone.now()
+                for title in titles:
+                    row = totals.get(title.pk, {})
+                    score_sum = row.get("score_sum") or 0
+                    review_count = row.get("review_count") or 0
+                    if (title.score_sum, title.review_count) != (
+                        score_sum,
+                        review_count,
+                    ):
+                        title.score_sum = score_sum
+                        title.review_count = review_count
+                        title.updated_at = now
+                        stale.append(title)
+                if stale and not dry_run:
+                    Title.objects.bulk_update(
+                        stale, ["score_sum", "review_count", "updated_at"]
+                    )
+            checked += len(titles)
+            fixed += len(stale)
+            self.stdout.write(
+                f"Проверено: {checked}, расхождений: {fixed}"
+            )
+
+        if fixed and not dry_run:
+            data_imported.send(sender=self.__class__)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Проверено: {checked}, исправлено: "
+                f"{0 if dry_run else fixed}"
+            )
+        )
@@ -0,0 +1,330 @@
+import datetime as dt
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.management.bulk import (batched, copy_rows, keep_dates,
+                                     reset_sequences)
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.signals import data_imported
+
+BATCH_SIZE = 5000
+# Отзывы и комментарии датируются последними тремя годами.
+DATE_SPAN = 3 * 365 * 24 * 3600
+# Тексты берутся из заранее собранного набора: генерация на каждую
+# строку дороже самой вставки.
+TEXT_POOL = 1024
+
+WORDS = (
+    "книга", "фильм", "песня", "сюжет", "герой", "финал", "автор",
+    "режиссёр", "музыка", "история", "сцена", "роль", "мир", "время",
+    "любовь", "дорога", "город", "море", "ночь", "свет", "тайна",
+    "отличный", "скучный", "яркий", "долгий", "неожиданный", "добрый",
+    "очень", "совсем", "снова", "читать", "смотреть", "слушать",
+)
+
+
+def zipf_weights(size, exponent, rng):
+    """Веса популярности 1 / ранг ** exponent.
+
+    Ранги перемешаны, чтобы популярные объекты не шли подряд по id.
+    """
+    ranks = list(range(1, size + 1))
+    rng.shuffle(ranks)
+    return [rank ** -exponent for rank in ranks]
+
+
+def allocate(total, weights, cap=None):
+    """Делит total между объектами пропорционально весам.
+
+    Доля больше cap обрезается, а излишек делится между остальными
+    пропорционально их весам. Дробные остатки достаются самым тяжёлым.
+    """
+    counts = [0] * len(weights)
+    free = sorted(range(len(weights)), key=weights.__getitem__, reverse=True)
+    remaining = total
+    while cap is not None and free:
+        scale = remaining / sum(weights[index] for index in free)
+        full = [index for index in free if weights[index] * scale >= cap]
+        if not full:
+            break
+        for index in full:
+            counts[index] = cap
+        remaining -= cap * len(full)
+        free = free[len(full):]
+    if free:
+        scale = remaining / sum(weights[index] for index in free)
+        for index in free:
+            counts[index] = int(weights[index] * scale)
+            remaining -= counts[index]
+    for index in free[:remaining]:
+        counts[index] += 1
+    return counts
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерация синтетических пользователей, каталога, отзывов и "
+        "комментариев для нагрузочной проверки."
+    )
+
+    def add_arguments(self, parser):
+        sizes = (
+            ("users", 1000, "пользователей"),
+            ("categories", 10, "категорий"),
+            ("genres", 30, "жанров"),
+            ("titles", 10000, "произведений"),
+            ("reviews", 100000, "отзывов"),
+            ("comments", 200000, "комментариев"),
+        )
+        for name, default, label in sizes:
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"Количество {label}.",
+            )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Зерно генератора: одинаковое зерно на той же базе "
+                 "даёт одинаковые данные.",
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Показатель распределения Ципфа для популярности "
+                 "произведений, отзывов, жанров и комментаторов.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество строк в одной пачке вставки.",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Не использовать COPY даже на PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("--batch-size должен быть больше нуля.")
+        sizes = {
+            name: options[name]
+            for name in (
+                "users", "categories", "genres", "titles", "reviews",
+                "comments",
+            )
+        }
+        if any(size < 0 for size in sizes.values()):
+            raise CommandError("Размеры таблиц не могут быть отрицательными.")
+        if sizes["reviews"] > sizes["users"] * sizes["titles"]:
+            raise CommandError(
+                "Отзывов больше, чем пар пользователь-произведение: "
+                "каждый пользователь оставляет не больше одного отзыва "
+                "на произведение."
+            )
+        if sizes["comments"] and not (sizes["reviews"] and sizes["users"]):
+            raise CommandError("Для комментариев нужны отзывы.")
+        self.use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        self.rng = random.Random(options["seed"])
+        self.exponent = options["zipf"]
+        self.texts = {}
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        with transaction.atomic():
+            self.bases = {
+                model: next_pk(model)
+                for model in (CustomUser, Category, Genre, Title,
+                              Title.genre.through, Review, Comment)
+            }
+            total = self.generate(**sizes)
+            reset_sequences(self.bases)
+            Title.objects.filter(
+                pk__gte=self.bases[Title]
+            ).recount_scores()
+        data_imported.send(sender=self.__class__)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Сгенерировано {total} строк за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-6):.0f} строк/с)."
+        ))
+
+    def generate(self, users, categories, genres, titles, reviews,
+                 comments):
+        rng = self.rng
+        total = self.insert(CustomUser, self.users(users))
+        total += self.insert(
+            Category, self.slugs(Category, categories, "Категория")
+        )
+        total += self.insert(Genre, self.slugs(Genre, genres, "Жанр"))
+        category_weights = list(accumulate(
+            zipf_weights(categories, self.exponent, rng)
+        ))
+        genre_weights = list(accumulate(
+            zipf_weights(genres, self.exponent, rng)
+        ))
+        links = []
+        total += self.insert(Title, self.titles(
+            titles, category_weights, genre_weights, links
+        ))
+        total += self.insert(Title.genre.through, links)
+        # Счётчики комментариев известны заранее и пишутся вместе с
+        # отзывами; рейтинг пересчитывается после вставки.
+        review_counts = allocate(
+            reviews, zipf_weights(titles, self.exponent, rng), cap=users
+        ) if reviews else []
+        comment_counts = allocate(
+            comments, zipf_weights(reviews, self.exponent, rng)
+        ) if comments else [0] * reviews
+        total += self.insert(Review, self.reviews(
+            review_counts, comment_counts, users
+        ))
+        user_weights = list(accumulate(
+            zipf_weights(users, self.exponent, rng)
+        ))
+        total += self.insert(Comment, self.comments(
+            comment_counts, user_weights
+        ))
+        return total
+
+    def insert(self, model, rows):
+        """Вставка словарей значений пачками через COPY или bulk_create."""
+        name = model._meta.db_table
+        inserted = 0
+        started = time.monotonic()
+        with keep_dates(model):
+            for batch in batched(rows, self.batch_size):
+                if self.use_copy:
+                    copy_rows(model, batch)
+                else:
+                    model.objects.bulk_create(
+                        [model(**values) for values in batch],
+                        batch_size=len(batch),
+                    )
+                inserted += len(batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{name}: {inserted} строк, "
+                    f"{inserted / max(elapsed, 1e-6):.0f} строк/с"
+                )
+        return inserted
+
+    def text(self, low, high):
+        pool = self.texts.get((low, high))
+        if pool is None:
+            pool = self.texts[low, high] = [
+                " ".join(self.rng.choices(
+                    WORDS, k=self.rng.randint(low, high)
+                )).capitalize()
+                for _ in range(TEXT_POOL)
+            ]
+        return pool[self.rng.randrange(TEXT_POOL)]
+
+    def date(self):
+        return self.now - dt.timedelta(
+            seconds=self.rng.randrange(DATE_SPAN)
+        )
+
+    def users(self, count):
+        base = self.bases[CustomUser]
+        for pk in range(base, base + count):
+            yield {
+                "id": pk,
+                "username": f"seed{pk}",
+                "email": f"seed{pk}@yamdb.fake",
+                "password": f"{UNUSABLE_PASSWORD_PREFIX}seed",
+                "bio": self.text(3, 15),
+                "date_joined": self.now,
+            }
+
+    def slugs(self, model, count, label):
+        base = self.bases[model]
+        prefix = model._meta.model_name
+        for pk in range(base, base + count):
+            yield {"id": pk, "name": f"{label} {pk}", "slug": f"{prefix}{pk}"}
+
+    def titles(self, count, category_weights, genre_weights, links):
+        """Произведения; связи с жанрами копятся в links для вставки."""
+        rng = self.rng
+        base = self.bases[Title]
+        link_pk = self.bases[Title.genre.through]
+        categories = range(self.bases[Category], self.bases[Category] + len(
+            category_weights
+        ))
+        genres = range(self.bases[Genre], self.bases[Genre] + len(
+            genre_weights
+        ))
+        for pk in range(base, base + count):
+            chosen = rng.choices(
+                genres, cum_weights=genre_weights, k=rng.randint(1, 3)
+            ) if genres else []
+            for genre in dict.fromkeys(chosen):
+                links.append({"id": link_pk, "title_id": pk,
+                              "genre_id": genre})
+                link_pk += 1
+            yield {
+                "id": pk,
+                "name": f"{self.text(1, 4)} {pk}",
+                "year": rng.randint(1900, self.now.year),
+                "description": self.text(5, 25)[:200],
+                "category_id": rng.choices(
+                    categories, cum_weights=category_weights
+                )[0] if categories else None,
+            }
+
+    def reviews(self, review_counts, comment_counts, users):
+        """Отзывы: у каждого произведения авторы без повторов."""
+        rng = self.rng
+        pk = self.bases[Review]
+        user_base = self.bases[CustomUser]
+        for offset, count in enumerate(review_counts):
+            for author in rng.sample(range(users), count):
+                yield {
+                    "id": pk,
+                    "title_id": self.bases[Title] + offset,
+                    "author_id": user_base + author,
+                    "text": self.text(5, 60),
+                    "score": min(10, max(1, round(rng.gauss(7, 2)))),
+                    "pub_date": self.date(),
+                    "comments_count": comment_counts[
+                        pk - self.bases[Review]
+                    ],
+                }
+                pk += 1
+
+    def comments(self, comment_counts, user_weights):
+        rng = self.rng
+        pk = self.bases[Comment]
+        users = range(
+            self.bases[CustomUser], self.bases[CustomUser] + len(user_weights)
+        )
+        for offset, count in enumerate(comment_counts):
+            for author in rng.choices(users, cum_weights=user_weights,
+                                      k=count):
+                yield {
+                    "id": pk,
+                    "review_id": self.bases[Review] + offset,
+                    "author_id": author,
+                    "text": self.text(2, 30),
+                    "pub_date": self.date(),
+                }
+                pk += 1
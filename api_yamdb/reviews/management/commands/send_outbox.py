@@ -0,0 +1,125 @@
+import datetime as dt
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews.models import OutboxEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF = 60
+MAX_BACKOFF = 3600
+INTERVAL = 5
+
+
+def backoff(attempts, base=BACKOFF, limit=MAX_BACKOFF):
+    """Задержка перед следующей попыткой: экспонента с ограничением."""
+    return dt.timedelta(seconds=min(base * 2 ** (attempts - 1), limit))
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди пачками через одно соединение."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество писем в одной пачке.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=MAX_ATTEMPTS,
+            help="После стольких неудачных попыток письмо не отправляется.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, проверяя очередь каждые --interval "
+                 "секунд.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=INTERVAL,
+            help="Пауза между проверками пустой очереди, в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.max_attempts = options["max_attempts"]
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = self.send_batch()
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent or batch_failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово! Отправлено: {sent}, ошибок: {failed}"
+        ))
+
+    def send_batch(self):
+        """Отправляет одну пачку; строки заблокированы до её фиксации.
+
+        SKIP LOCKED позволяет нескольким воркерам разбирать очередь, не
+        отправляя одно письмо дважды.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(sent__isnull=True, failed=False, next_attempt__lte=now)
+                .order_by("next_attempt")[:self.batch_size]
+            )
+            if not emails:
+                return 0, 0
+            sent = []
+            errors = {}
+            connection = get_connection()
+            try:
+                connection.open()
+                for email in emails:
+                    try:
+                        EmailMessage(
+                            email.subject, email.body, email.from_email,
+                            [email.recipient], connection=connection,
+                        ).send()
+                    except Exception as error:
+                        errors[email.pk] = error
+                    else:
+                        sent.append(email)
+            except Exception as error:
+                # Соединение не открылось: откладываем всю пачку.
+                for email in emails:
+                    errors.setdefault(email.pk, error)
+            finally:
+                connection.close()
+            self.save_results(emails, sent, errors, now)
+        return len(sent), len(errors)
+
+    def save_results(self, emails, sent, errors, now):
+        for email in sent:
+            email.sent = now
+            email.attempts += 1
+        retried = [email for email in emails if email.pk in errors]
+        for email in retried:
+            email.attempts += 1
+            email.last_error = repr(errors[email.pk])
+            email.failed = email.attempts >= self.max_attempts
+            email.next_attempt = now + backoff(email.attempts)
+        OutboxEmail.objects.bulk_update(
+            sent + retried,
+            ["sent", "attempts", "last_error", "failed", "next_attempt"],
+        )
+        for email in retried:
+            self.stderr.write(
+                f"{email.recipient}: попытка {email.attempts} - "
+                f"{email.last_error}"
+            )
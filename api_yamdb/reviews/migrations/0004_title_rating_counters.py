@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счётчики одним UPDATE с подзапросами по отзывам."""
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(title=OuterRef('pk')).order_by()
+    Title.objects.update(
+        score_sum=Coalesce(
+            Subquery(
+                reviews.values('title').annotate(s=Sum('score')).values('s'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        review_count=Coalesce(
+            Subquery(
+                reviews.values('title').annotate(c=Count('pk')).values('c'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_auto_20220701_1125'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='title',
+            name='rating',
+        ),
+    ]
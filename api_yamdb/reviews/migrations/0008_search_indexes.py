@@ -0,0 +1,96 @@
+from django.db import migrations
+
+TABLES = ('reviews_title', 'reviews_genre', 'reviews_category')
+
+
+def postgresql_forwards(schema_editor):
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )
+    if cursor.fetchone() is None:
+        # Без contrib поиск работает через icontains без индекса.
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        # Выражение совпадает с тем, что Django строит для icontains.
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_name_trgm" '
+            f'ON "{table}" USING gin (UPPER("name"::text) gin_trgm_ops)'
+        )
+
+
+def postgresql_backwards(schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_name_trgm"')
+
+
+def sqlite_forwards(schema_editor):
+    # Пересоздание таблицы при AlterField на SQLite удаляет её триггеры:
+    # такие миграции должны повторить эту функцию.
+    for table in TABLES:
+        fts = f'{table}_fts'
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5('
+            f"name, content='{table}', content_rowid='id', "
+            f"tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_insert" '
+            f'AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" (rowid, name) VALUES (new.id, new.name); '
+            f'END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_delete" '
+            f'AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" ("{fts}", rowid, name) '
+            f"VALUES ('delete', old.id, old.name); "
+            f'END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_update" '
+            f'AFTER UPDATE OF name ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" ("{fts}", rowid, name) '
+            f"VALUES ('delete', old.id, old.name); "
+            f'INSERT INTO "{fts}" (rowid, name) VALUES (new.id, new.name); '
+            f'END'
+        )
+        schema_editor.execute(
+            f'INSERT INTO "{fts}" ("{fts}") VALUES (\'rebuild\')'
+        )
+
+
+def sqlite_backwards(schema_editor):
+    for table in TABLES:
+        fts = f'{table}_fts'
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{trigger}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        postgresql_forwards(schema_editor)
+    elif vendor == 'sqlite':
+        sqlite_forwards(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        postgresql_backwards(schema_editor)
+    elif vendor == 'sqlite':
+        sqlite_backwards(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
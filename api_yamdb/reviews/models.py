@@ -1,10 +1,20 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .validators import validate_year
 
 
+def calculate_rating(score_sum, review_count):
+    """Среднее с округлением половины вверх в целочисленной арифметике."""
+    if not review_count:
+        return None
+    return (2 * score_sum + review_count) // (2 * review_count)
+
+
 class CustomUser(AbstractUser):
     """Кастомная модель пользователя. Добавлены поля биографии и роли."""
 
@@ -33,6 +43,14 @@ class CustomUser(AbstractUser):
         default="user",
         max_length=255
     )
+    token_version = models.PositiveIntegerField(
+        "Версия токенов",
+        default=0,
+    )
+
+    # Поля, которые попадают в claims токена: их изменение отзывает
+    # выданные токены через token_version.
+    TOKEN_CLAIM_FIELDS = ("role", "is_staff", "is_superuser", "is_active")
 
     class Meta:
         verbose_name = "Пользователь"
@@ -41,6 +59,26 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if self.pk is not None and (
+            update_fields is None
+            or set(update_fields) & set(self.TOKEN_CLAIM_FIELDS)
+        ):
+            stored = CustomUser.objects.filter(pk=self.pk).values(
+                *self.TOKEN_CLAIM_FIELDS
+            ).first()
+            if stored and any(
+                stored[field] != getattr(self, field)
+                for field in self.TOKEN_CLAIM_FIELDS
+            ):
+                self.token_version += 1
+                if update_fields is not None:
+                    kwargs["update_fields"] = {
+                        *update_fields, "token_version"
+                    }
+        super().save(*args, **kwargs)
+
     @property
     def is_user(self):
         return self.role == "user"
@@ -92,6 +130,60 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def add_score(self, score_delta, count_delta=0):
+        """Атомарно сдвигает счётчики рейтинга на дельту одним UPDATE."""
+        return self.update(
+            score_sum=F("score_sum") + score_delta,
+            review_count=F("review_count") + count_delta,
+            updated_at=timezone.now(),
+        )
+
+    def review_totals(self, reviews=None):
+        """Сумма и количество оценок по таблице отзывов (подзапросы).
+
+        reviews ограничивает учитываемые отзывы, по умолчанию - все.
+        """
+        if reviews is None:
+            reviews = Review.objects.all()
+        reviews = (
+            reviews.filter(title=OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+        return {
+            "score_sum": Coalesce(
+                Subquery(
+                    reviews.annotate(total=Sum("score")).values("total"),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+            "review_count": Coalesce(
+                Subquery(
+                    reviews.annotate(total=Count("pk")).values("total"),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+        }
+
+    def recount_scores(self):
+        """Пересчитывает счётчики по таблице отзывов одним UPDATE."""
+        return self.update(updated_at=timezone.now(), **self.review_totals())
+
+    def stale_scores(self):
+        """Произведения, у которых счётчики разошлись с отзывами."""
+        totals = self.review_totals()
+        return self.annotate(
+            actual_score_sum=totals["score_sum"],
+            actual_review_count=totals["review_count"],
+        ).exclude(
+            score_sum=F("actual_score_sum"),
+            review_count=F("actual_review_count"),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(
         "Название произведения",
@@ -122,11 +214,20 @@ class Title(models.Model):
         related_name="titles",
         verbose_name="Категория произведения",
     )
-    rating = models.IntegerField(
-        "Рейтинг произведения",
-        blank=True,
-        null=True,
+    score_sum = models.PositiveIntegerField(
+        "Сумма оценок",
+        default=0,
+    )
+    review_count = models.PositiveIntegerField(
+        "Количество отзывов",
+        default=0,
     )
+    updated_at = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
@@ -135,6 +236,11 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка, округлённая до целого; без отзывов - None."""
+        return calculate_rating(self.score_sum, self.review_count)
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -150,6 +256,43 @@ class GenreTitle(models.Model):
         return self.name
 
 
+class ReviewQuerySet(models.QuerySet):
+    def add_comments(self, delta):
+        """Атомарно сдвигает счётчик комментариев одним UPDATE."""
+        return self.update(
+            comments_count=F("comments_count") + delta,
+            updated_at=timezone.now(),
+        )
+
+    def comment_totals(self, comments=None):
+        """Количество комментариев по таблице комментариев (подзапрос)."""
+        if comments is None:
+            comments = Comment.objects.all()
+        return Coalesce(
+            Subquery(
+                comments.filter(review=OuterRef("pk"))
+                .order_by()
+                .values("review")
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        )
+
+    def recount_comments(self):
+        """Пересчитывает счётчик комментариев одним UPDATE."""
+        return self.update(
+            comments_count=self.comment_totals(), updated_at=timezone.now()
+        )
+
+    def stale_comments(self):
+        """Отзывы, у которых счётчик разошёлся с комментариями."""
+        return self.annotate(
+            actual_comments_count=self.comment_totals()
+        ).exclude(comments_count=F("actual_comments_count"))
+
+
 class Review(models.Model):
     author = models.ForeignKey(
         CustomUser,
@@ -174,6 +317,16 @@ class Review(models.Model):
         "Дата добавления",
         auto_now_add=True,
     )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев",
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -182,6 +335,12 @@ class Review(models.Model):
                 fields=("author", "title",),
             )
         ]
+        indexes = [
+            models.Index(
+                fields=("title", "pub_date", "id"),
+                name="review_title_pub_date_idx",
+            ),
+        ]
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
 
@@ -209,10 +368,117 @@ class Comment(models.Model):
         "Дата добавления",
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=("review", "pub_date", "id"),
+                name="comment_review_pub_date_idx",
+            ),
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
     def __str__(self):
         return self.text
+
+
+class ImportCheckpoint(models.Model):
+    """Прогресс инкрементального импорта CSV для возобновления."""
+
+    source = models.CharField(
+        "Файл",
+        max_length=255,
+        unique=True,
+    )
+    checksum = models.CharField(
+        "Контрольная сумма файла",
+        max_length=64,
+    )
+    position = models.PositiveIntegerField(
+        "Обработано строк",
+        default=0,
+    )
+    finished = models.BooleanField(
+        "Файл обработан",
+        default=False,
+    )
+    updated = models.DateTimeField(
+        "Дата обновления",
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = "Контрольная точка импорта"
+        verbose_name_plural = "Контрольные точки импорта"
+
+    def __str__(self):
+        return f"{self.source}: {self.position}"
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди отправки (transactional outbox).
+
+    Запись создаётся в транзакции запроса, отправляет её команда
+    send_outbox.
+    """
+
+    subject = models.CharField(
+        "Тема",
+        max_length=255,
+    )
+    body = models.TextField(
+        "Текст",
+    )
+    from_email = models.CharField(
+        "Отправитель",
+        max_length=254,
+        blank=True,
+        null=True,
+    )
+    recipient = models.EmailField(
+        "Получатель",
+    )
+    created = models.DateTimeField(
+        "Дата создания",
+        auto_now_add=True,
+    )
+    next_attempt = models.DateTimeField(
+        "Следующая попытка",
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        "Попыток отправки",
+        default=0,
+    )
+    last_error = models.TextField(
+        "Последняя ошибка",
+        blank=True,
+    )
+    sent = models.DateTimeField(
+        "Дата отправки",
+        blank=True,
+        null=True,
+    )
+    failed = models.BooleanField(
+        "Отправка прекращена",
+        default=False,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("next_attempt",),
+                condition=Q(sent__isnull=True, failed=False),
+                name="outbox_pending_idx",
+            ),
+        ]
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Отправляется командами массовой загрузки, которые пишут в обход
+# сигналов моделей (bulk_create, COPY, TRUNCATE).
+data_imported = Signal()
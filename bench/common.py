@@ -0,0 +1,9 @@
+"""Общие функции скриптов бенчмарков."""
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу; values отсортированы."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(share * len(values)) - 1))
+    return values[index]
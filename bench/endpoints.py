@@ -0,0 +1,535 @@
+"""Бенчмарк всех маршрутов api/urls.py на синтетических данных.
+
+Во временной тестовой базе командой seed_data строится набор данных
+заданного размера с неравномерной популярностью произведений, затем
+каждый сценарий (чтение списков и объектов, создание, изменение и
+удаление, регистрация, токен, выгрузка) выполняется через тестовый
+клиент DRF --iterations раз после прогрева. Для маршрута сохраняются
+p50/p95/p99 задержки, количество запросов к базе и пик выделенной
+памяти (tracemalloc, отдельным прогоном).
+
+    python bench/endpoints.py --titles 10000 --reviews 1000000 \\
+        --comments 2000000 --keepdb --output results.json
+
+С --baseline результаты сравниваются с сохранённым прогоном: рост
+количества запросов или p95 и памяти больше чем на --tolerance (с
+порогом шума) считается регрессией, и скрипт завершается с кодом 1.
+Прогоны с другими размерами данных, зерном, базой или режимом кэша
+ответов не сравниваются: скрипт останавливается до замеров.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from io import StringIO
+
+from common import percentile
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_yamdb"
+)
+# Разница меньше порога считается шумом при сравнении с базовым прогоном.
+LATENCY_NOISE_MS = 1.0
+MEMORY_NOISE_KIB = 64
+# Условия прогона, без совпадения которых сравнение бессмысленно.
+COMPARABLE_META = ("sizes", "seed", "database", "response_cache")
+
+# prepare(ctx, i) готовит данные вне замера и возвращает (url, тело).
+Scenario = namedtuple(
+    "Scenario", "name route method client status prepare max_iterations"
+)
+Scenario.__new__.__defaults__ = (None,)
+
+
+class Context:
+    """Клиенты и объекты, к которым обращаются сценарии."""
+
+    def __init__(self):
+        from api.tokens import get_jwt_token
+        from rest_framework.test import APIClient
+        from reviews.models import (Category, Comment, CustomUser, Genre,
+                                    Review, Title)
+
+        self.Category, self.Comment = Category, Comment
+        self.CustomUser, self.Genre = CustomUser, Genre
+        self.Review, self.Title = Review, Title
+        self.run = uuid.uuid4().hex[:8]
+        # Самые популярные произведение и отзыв: худший случай для
+        # списков отзывов и комментариев.
+        self.title = Title.objects.order_by("-review_count", "pk").first()
+        self.review = Review.objects.filter(title=self.title).order_by(
+            "-comments_count", "pk"
+        ).first()
+        self.genre = self.title.genre.values_list("slug", flat=True).first()
+        self.admin = CustomUser.objects.create(
+            username=f"bench-admin-{self.run}",
+            email=f"bench-admin-{self.run}@yamdb.fake",
+            role="admin",
+        )
+        self.user = CustomUser.objects.create(
+            username=f"bench-user-{self.run}",
+            email=f"bench-user-{self.run}@yamdb.fake",
+            confirmation_code="bench",
+        )
+        self.own_review = self.add_review(self.title, self.user)
+        self.own_comment = self.add_comment(self.review, self.user)
+        self.clients = {"guest": APIClient()}
+        for role, user in (("admin", self.admin), ("user", self.user)):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {get_jwt_token(user)["token"]}'
+            )
+            self.clients[role] = client
+
+    def name(self, kind, i):
+        return f"b{self.run}-{kind}{i}"
+
+    def add_user(self, i):
+        return self.CustomUser.objects.create(
+            username=self.name("user", i),
+            email=f"{self.name('user', i)}@yamdb.fake",
+        )
+
+    def add_review(self, title, author):
+        self.Title.objects.filter(pk=title.pk).add_score(5, 1)
+        return self.Review.objects.create(
+            title=title, author=author, text="Отзыв", score=5
+        )
+
+    def add_comment(self, review, author):
+        self.Review.objects.filter(pk=review.pk).add_comments(1)
+        return self.Comment.objects.create(
+            review=review, author=author, text="Комментарий"
+        )
+
+    @property
+    def reviews_url(self):
+        return f"/api/v1/titles/{self.title.pk}/reviews/"
+
+    @property
+    def comments_url(self):
+        return f"{self.reviews_url}{self.review.pk}/comments/"
+
+
+def get(url):
+    return lambda ctx, i: (url(ctx), None)
+
+
+def slug_payload(kind):
+    return lambda ctx, i: (
+        f"/api/v1/{kind}/",
+        {"name": ctx.name(kind, i), "slug": ctx.name(kind, i)},
+    )
+
+
+def delete_slug(model, kind):
+    def prepare(ctx, i):
+        slug = ctx.name(f"{kind}-deleted", i)
+        getattr(ctx, model).objects.create(name=slug, slug=slug)
+        return f"/api/v1/{kind}/{slug}/", None
+    return prepare
+
+
+def title_payload(ctx, i):
+    return {
+        "name": ctx.name("title", i),
+        "year": 2000,
+        "genre": [ctx.Genre.objects.values_list("slug", flat=True)[0]],
+        "category": ctx.Category.objects.values_list("slug", flat=True)[0],
+    }
+
+
+def delete_title(ctx, i):
+    title = ctx.Title.objects.create(name=ctx.name("title", i), year=2000)
+    return f"/api/v1/titles/{title.pk}/", None
+
+
+def post_review(ctx, i):
+    title = ctx.Title.objects.create(name=ctx.name("title", i), year=2000)
+    return (
+        f"/api/v1/titles/{title.pk}/reviews/",
+        {"text": "Отзыв", "score": 7},
+    )
+
+
+def delete_review(ctx, i):
+    review = ctx.add_review(ctx.title, ctx.add_user(i))
+    return f"{ctx.reviews_url}{review.pk}/", None
+
+
+def delete_comment(ctx, i):
+    comment = ctx.add_comment(ctx.review, ctx.user)
+    return f"{ctx.comments_url}{comment.pk}/", None
+
+
+def delete_user(ctx, i):
+    return f"/api/v1/users/{ctx.add_user(i).username}/", None
+
+
+def scenarios():
+    return [
+        Scenario("api-root", "api-root", "get", "user", 200,
+                 get(lambda ctx: "/api/v1/")),
+        Scenario(
+            "signup", "v1/auth/signup/", "post", "guest", 200,
+            lambda ctx, i: ("/api/v1/auth/signup/", {
+                "username": ctx.name("signup", i),
+                "email": f"{ctx.name('signup', i)}@yamdb.fake",
+            }),
+        ),
+        Scenario(
+            "token", "v1/auth/token/", "post", "guest", 200,
+            lambda ctx, i: ("/api/v1/auth/token/", {
+                "username": ctx.user.username, "confirmation_code": "bench",
+            }),
+        ),
+        Scenario("users-list", "users-list", "get", "admin", 200,
+                 get(lambda ctx: "/api/v1/users/")),
+        Scenario(
+            "users-create", "users-list", "post", "admin", 201,
+            lambda ctx, i: ("/api/v1/users/", {
+                "username": ctx.name("new", i),
+                "email": f"{ctx.name('new', i)}@yamdb.fake",
+            }),
+        ),
+        Scenario(
+            "users-detail", "users-detail", "get", "admin", 200,
+            get(lambda ctx: f"/api/v1/users/{ctx.user.username}/"),
+        ),
+        Scenario(
+            "users-update", "users-detail", "patch", "admin", 200,
+            lambda ctx, i: (
+                f"/api/v1/users/{ctx.user.username}/", {"bio": f"Био {i}"}
+            ),
+        ),
+        Scenario("users-delete", "users-detail", "delete", "admin", 204,
+                 delete_user),
+        Scenario("users-me", "users-detail", "get", "user", 200,
+                 get(lambda ctx: "/api/v1/users/me/")),
+        Scenario(
+            "users-me-update", "users-detail", "patch", "user", 200,
+            lambda ctx, i: ("/api/v1/users/me/", {"bio": f"Био {i}"}),
+        ),
+        Scenario("genres-list", "genres-list", "get", "guest", 200,
+                 get(lambda ctx: "/api/v1/genres/")),
+        Scenario("genres-create", "genres-list", "post", "admin", 201,
+                 slug_payload("genres")),
+        Scenario("genres-delete", "genres-detail", "delete", "admin", 204,
+                 delete_slug("Genre", "genres")),
+        Scenario("categories-list", "categories-list", "get", "guest", 200,
+                 get(lambda ctx: "/api/v1/categories/")),
+        Scenario("categories-create", "categories-list", "post", "admin",
+                 201, slug_payload("categories")),
+        Scenario("categories-delete", "categories-detail", "delete", "admin",
+                 204, delete_slug("Category", "categories")),
+        Scenario("titles-list", "titles-list", "get", "guest", 200,
+                 get(lambda ctx: "/api/v1/titles/")),
+        Scenario(
+            "titles-filter", "titles-list", "get", "guest", 200,
+            get(lambda ctx: (
+                f"/api/v1/titles/?genre={ctx.genre}&year={ctx.title.year}"
+            )),
+        ),
+        Scenario(
+            "titles-create", "titles-list", "post", "admin", 201,
+            lambda ctx, i: ("/api/v1/titles/", title_payload(ctx, i)),
+        ),
+        Scenario(
+            "titles-bulk", "titles-bulk", "post", "admin", 200,
+            lambda ctx, i: ("/api/v1/titles/bulk/", [
+                title_payload(ctx, f"{i}-{n}") for n in range(10)
+            ]),
+        ),
+        Scenario(
+            "titles-detail", "titles-detail", "get", "guest", 200,
+            get(lambda ctx: f"/api/v1/titles/{ctx.title.pk}/"),
+        ),
+        Scenario(
+            "titles-expand", "titles-detail", "get", "guest", 200,
+            get(lambda ctx: (
+                f"/api/v1/titles/{ctx.title.pk}/?expand=reviews.comments"
+            )),
+        ),
+        Scenario(
+            "titles-update", "titles-detail", "patch", "admin", 200,
+            lambda ctx, i: (
+                f"/api/v1/titles/{ctx.title.pk}/", {"description": f"{i}"}
+            ),
+        ),
+        Scenario("titles-delete", "titles-detail", "delete", "admin", 204,
+                 delete_title),
+        Scenario("reviews-list", "reviews-list", "get", "guest", 200,
+                 get(lambda ctx: ctx.reviews_url)),
+        Scenario(
+            "reviews-cursor", "reviews-list", "get", "guest", 200,
+            get(lambda ctx: f"{ctx.reviews_url}?cursor="),
+        ),
+        Scenario("reviews-create", "reviews-list", "post", "user", 201,
+                 post_review),
+        Scenario(
+            "reviews-detail", "reviews-detail", "get", "guest", 200,
+            get(lambda ctx: f"{ctx.reviews_url}{ctx.review.pk}/"),
+        ),
+        Scenario(
+            "reviews-update", "reviews-detail", "patch", "user", 200,
+            lambda ctx, i: (
+                f"{ctx.reviews_url}{ctx.own_review.pk}/", {"score": i % 10 + 1}
+            ),
+        ),
+        Scenario("reviews-delete", "reviews-detail", "delete", "admin", 204,
+                 delete_review),
+        Scenario("comments-list", "comments-list", "get", "guest", 200,
+                 get(lambda ctx: ctx.comments_url)),
+        Scenario(
+            "comments-create", "comments-list", "post", "user", 201,
+            lambda ctx, i: (ctx.comments_url, {"text": f"Комментарий {i}"}),
+        ),
+        Scenario(
+            "comments-detail", "comments-detail", "get", "guest", 200,
+            get(lambda ctx: f"{ctx.comments_url}{ctx.own_comment.pk}/"),
+        ),
+        Scenario(
+            "comments-update", "comments-detail", "patch", "user", 200,
+            lambda ctx, i: (
+                f"{ctx.comments_url}{ctx.own_comment.pk}/", {"text": f"{i}"}
+            ),
+        ),
+        Scenario("comments-delete", "comments-detail", "delete", "admin",
+                 204, delete_comment),
+        # Выгрузка читает всю базу: на больших наборах хватает трёх замеров.
+        Scenario("export", "v1/export/", "get", "admin", 200,
+                 get(lambda ctx: "/api/v1/export/"), max_iterations=3),
+    ]
+
+
+def api_routes():
+    """Маршруты api/urls.py: имя или шаблон, без вариантов с .format."""
+    from api import urls
+
+    def walk(patterns, prefix=""):
+        for pattern in patterns:
+            if hasattr(pattern, "url_patterns"):
+                yield from walk(
+                    pattern.url_patterns, prefix + str(pattern.pattern)
+                )
+            elif "(?P<format>" not in str(pattern.pattern):
+                yield pattern.name or prefix + str(pattern.pattern)
+    return set(walk(urls.urlpatterns))
+
+
+def uncovered_routes(selected):
+    return api_routes() - {scenario.route for scenario in selected}
+
+
+def send(ctx, scenario, i):
+    """Запрос сценария; возвращает время ответа в секундах."""
+    url, data = scenario.prepare(ctx, i)
+    method = getattr(ctx.clients[scenario.client], scenario.method)
+    started = time.perf_counter()
+    if data is None:
+        response = method(url)
+    else:
+        response = method(url, data, format="json")
+    if response.streaming:
+        b"".join(response.streaming_content)
+    finished = time.perf_counter()
+    if response.status_code != scenario.status:
+        raise RuntimeError(
+            f"{scenario.name}: {scenario.method.upper()} {url} вернул "
+            f"{response.status_code}, ожидался {scenario.status}"
+        )
+    return finished - started
+
+
+def measure(ctx, scenario, iterations):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    if scenario.max_iterations:
+        iterations = min(iterations, scenario.max_iterations)
+    send(ctx, scenario, 0)  # прогрев
+    latencies = sorted(
+        send(ctx, scenario, i) for i in range(1, iterations + 1)
+    )
+    # Запросы и память - отдельным запросом: tracemalloc замедляет
+    # работу в разы. Подготовка данных в замер не попадает.
+    url, data = scenario.prepare(ctx, iterations + 1)
+    prepared = scenario._replace(prepare=lambda ctx, i: (url, data))
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            send(ctx, prepared, iterations + 1)
+            alloc = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "route": scenario.route,
+        "method": scenario.method.upper(),
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries": len(queries.captured_queries),
+        "alloc_kib": round(alloc / 1024, 1),
+    }
+
+
+def run_suite(iterations, names=None, output=print):
+    selected = [
+        scenario for scenario in scenarios()
+        if not names or scenario.name in names
+    ]
+    ctx = Context()
+    results = {}
+    output(f"{'сценарий':<20}{'p50':>9}{'p95':>9}{'p99':>9}"
+           f"{'запросы':>9}{'КиБ':>9}")
+    for scenario in selected:
+        result = measure(ctx, scenario, iterations)
+        results[scenario.name] = result
+        output(f"{scenario.name:<20}{result['p50_ms']:>9.2f}"
+               f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+               f"{result['queries']:>9}{result['alloc_kib']:>9.0f}")
+    return results
+
+
+def meta_mismatch(meta, baseline):
+    """Различия условий прогона и базового прогона, строками для вывода."""
+    base = baseline.get("meta", {})
+    return [
+        f"{key}: {base.get(key)} -> {meta[key]}"
+        for key in COMPARABLE_META
+        if base.get(key) != meta[key]
+    ]
+
+
+def compare(routes, baseline, tolerance):
+    """Регрессии относительно базового прогона, строками для вывода."""
+    regressions = []
+    for name, current in routes.items():
+        base = baseline.get("routes", {}).get(name)
+        if base is None:
+            continue
+        if current["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: запросов {base['queries']} -> {current['queries']}"
+            )
+        for key, noise in (
+            ("p95_ms", LATENCY_NOISE_MS), ("alloc_kib", MEMORY_NOISE_KIB)
+        ):
+            limit = max(base[key] * (1 + tolerance), base[key] + noise)
+            if current[key] > limit:
+                regressions.append(
+                    f"{name}: {key} {base[key]} -> {current[key]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--genres", type=int, default=30)
+    parser.add_argument("--titles", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=40000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument(
+        "--routes", help="только эти сценарии, через запятую"
+    )
+    parser.add_argument(
+        "--keepdb", action="store_true",
+        help="не удалять тестовую базу и не строить данные заново",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="без кэша ответов"
+    )
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", help="JSON прошлого прогона")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    options = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import (setup_databases, setup_test_environment,
+                                   teardown_databases)
+    from reviews.models import Title
+
+    from api_yamdb.db_pool import get_pools
+
+    setup_test_environment()
+    if options.no_cache:
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+    missing = uncovered_routes(scenarios())
+    if missing:
+        sys.exit(f"Нет сценариев для маршрутов: {', '.join(sorted(missing))}")
+    sizes = {
+        key: getattr(options, key)
+        for key in (
+            "users", "categories", "genres", "titles", "reviews", "comments"
+        )
+    }
+    meta = {
+        "sizes": sizes,
+        "seed": options.seed,
+        "iterations": options.iterations,
+        "database": connection.vendor,
+        "response_cache": bool(settings.RESPONSE_CACHE_TIMEOUT),
+        "python": platform.python_version(),
+    }
+    baseline = None
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        mismatch = meta_mismatch(meta, baseline)
+        if mismatch:
+            sys.exit("\n  ".join((
+                "Условия прогона отличаются от базового:", *mismatch
+            )))
+    databases = setup_databases(
+        verbosity=0, interactive=False, keepdb=options.keepdb
+    )
+    try:
+        if not (options.keepdb and Title.objects.exists()):
+            started = time.monotonic()
+            call_command("seed_data", seed=options.seed, stdout=StringIO(),
+                         **sizes)
+            print(f"Данные построены за {time.monotonic() - started:.0f} с",
+                  flush=True)
+        names = set(options.routes.split(",")) if options.routes else None
+        routes = run_suite(
+            options.iterations, names,
+            output=lambda line: print(line, flush=True),
+        )
+    finally:
+        for pools in get_pools().values():
+            pools.close()
+        if not options.keepdb:
+            teardown_databases(databases, verbosity=0)
+    meta["created"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(options.output, "w", encoding="utf-8") as file:
+        json.dump(
+            {"meta": meta, "routes": routes}, file,
+            ensure_ascii=False, indent=2,
+        )
+    if baseline is not None:
+        regressions = compare(routes, baseline, options.tolerance)
+        if regressions:
+            print("Регрессии:", *regressions, sep="\n  ")
+            sys.exit(1)
+        print("Регрессий относительно базового прогона нет")
+
+
+if __name__ == "__main__":
+    main()
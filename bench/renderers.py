@@ -0,0 +1,101 @@
+"""Размер и время рендеринга ответов: JSONRenderer DRF, orjson, MessagePack.
+
+Страница списка произведений в формате TitleSerializer собирается в
+памяти (база не нужна) и рендерится каждым рендерером --repeat раз.
+Выводятся медиана времени рендеринга, размер тела и размер после gzip
+(уровень как у GZipMiddleware).
+
+    python bench/renderers.py --sizes 10,100,1000 --repeat 50
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_yamdb"
+)
+
+
+def title_page(size):
+    genres = [
+        OrderedDict([("name", f"Жанр {i}"), ("slug", f"genre-{i}")])
+        for i in range(3)
+    ]
+    results = [
+        OrderedDict([
+            ("id", i),
+            ("name", f"Произведение {i}"),
+            ("year", 1900 + i % 120),
+            ("rating", i % 10 or None),
+            ("reviews_count", i * 7 % 50),
+            ("description", "Описание произведения " * 5),
+            ("genre", genres[:i % 3 + 1]),
+            ("category", OrderedDict([("name", "Книги"), ("slug", "books")])),
+        ])
+        for i in range(size)
+    ]
+    return OrderedDict([
+        ("count", 100000),
+        ("next", "http://yamdb.fake/api/v1/titles/?limit=10&offset=10"),
+        ("previous", None),
+        ("results", results),
+    ])
+
+
+def measure(renderer, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = renderer.render(data)
+        timings.append(time.perf_counter() - started)
+    return {
+        "render_ms": round(statistics.median(timings) * 1000, 3),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="файл для результатов в JSON")
+    options = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    import django
+
+    django.setup()
+    from api.renderers import MessagePackRenderer, ORJSONRenderer
+    from rest_framework.renderers import JSONRenderer
+
+    renderers = (
+        ("drf-json", JSONRenderer()),
+        ("orjson", ORJSONRenderer()),
+        ("msgpack", MessagePackRenderer()),
+    )
+    results = []
+    print(f"{'рендерер':<10}{'строк':>7}{'мс':>10}{'байт':>10}"
+          f"{'gzip':>10}", flush=True)
+    for size in (int(size) for size in options.sizes.split(",")):
+        data = title_page(size)
+        for name, renderer in renderers:
+            result = {"renderer": name, "size": size}
+            result.update(measure(renderer, data, options.repeat))
+            results.append(result)
+            print(f"{name:<10}{size:>7}{result['render_ms']:>10.3f}"
+                  f"{result['bytes']:>10}{result['gzip_bytes']:>10}",
+                  flush=True)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
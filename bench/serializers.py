@@ -0,0 +1,168 @@
+"""Сравнение ModelSerializer и RowSerializer (api.rows) на страницах списков.
+
+Во временной тестовой базе создаются произведения с жанрами, отзывы и
+комментарии, затем для каждого размера страницы выборка и сериализация
+страницы повторяются --repeat раз обоими путями. Выводятся медианы в
+миллисекундах и ускорение; вывод обоих путей сверяется побайтно.
+
+    python bench/serializers.py --sizes 10,100,1000 --repeat 20
+
+Настройки базы берутся из окружения, как у самого сервера.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_yamdb"
+)
+
+
+def fill(rows):
+    from reviews.models import (Category, Comment, CustomUser, Genre, Review,
+                                Title)
+
+    category = Category.objects.create(name="Книги", slug="books")
+    Genre.objects.bulk_create(
+        Genre(name=f"Жанр {i}", slug=f"genre-{i}") for i in range(5)
+    )
+    # bulk_create на SQLite не возвращает id, поэтому ссылки берутся
+    # из базы.
+    genres = list(Genre.objects.all())
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f"author{i}", email=f"author{i}@yamdb.fake")
+        for i in range(rows)
+    )
+    Title.objects.bulk_create(
+        Title(
+            name=f"Произведение {i}",
+            year=2000,
+            description="Описание " * 10,
+            category=category if i % 2 else None,
+            score_sum=7,
+            review_count=1,
+        )
+        for i in range(rows)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+        for title in Title.objects.all()
+        for genre in genres[:title.pk % 3 + 1]
+    )
+    title = Title.objects.first()
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text="Отзыв " * 50, score=7)
+        for author in CustomUser.objects.all()
+    )
+    review = Review.objects.first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text="Комментарий " * 20)
+        for author in CustomUser.objects.all()
+    )
+
+
+def median_ms(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def compare(name, queryset, serializer_class, row_serializer_class, size,
+            repeat):
+    from rest_framework.renderers import JSONRenderer
+
+    def model_path():
+        page = list(queryset[:size])
+        return serializer_class(page, many=True).data
+
+    def row_path():
+        serializer = row_serializer_class()
+        return serializer.to_representation(serializer.rows(queryset)[:size])
+
+    renderer = JSONRenderer()
+    if renderer.render(model_path()) != renderer.render(row_path()):
+        raise RuntimeError(f"{name}: вывод путей различается")
+    model_ms = median_ms(model_path, repeat)
+    row_ms = median_ms(row_path, repeat)
+    return {
+        "list": name,
+        "size": size,
+        "model_ms": round(model_ms, 2),
+        "row_ms": round(row_ms, 2),
+        "speedup": round(model_ms / row_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="файл для результатов в JSON")
+    options = parser.parse_args()
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    sys.path.insert(0, APP_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    import django
+
+    django.setup()
+    from api.rows import (CommentRowSerializer, ReviewRowSerializer,
+                          TitleRowSerializer)
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleSerializer)
+    from django.test.utils import setup_databases, teardown_databases
+    from reviews.models import Comment, Review, Title
+
+    from api_yamdb.db_pool import get_pools
+
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        fill(max(sizes))
+        lists = (
+            (
+                "titles",
+                Title.objects.select_related("category")
+                .prefetch_related("genre").order_by("id"),
+                TitleSerializer, TitleRowSerializer,
+            ),
+            (
+                "reviews",
+                Review.objects.select_related("author").order_by("id"),
+                ReviewSerializer, ReviewRowSerializer,
+            ),
+            (
+                "comments",
+                Comment.objects.select_related("author").order_by("id"),
+                CommentSerializer, CommentRowSerializer,
+            ),
+        )
+        results = []
+        print(f"{'список':<10}{'строк':>7}{'model, мс':>12}"
+              f"{'rows, мс':>12}{'ускорение':>12}", flush=True)
+        for name, queryset, serializer_class, row_class in lists:
+            for size in sizes:
+                result = compare(
+                    name, queryset, serializer_class, row_class, size,
+                    options.repeat,
+                )
+                results.append(result)
+                print(f"{name:<10}{size:>7}{result['model_ms']:>12.2f}"
+                      f"{result['row_ms']:>12.2f}"
+                      f"{result['speedup']:>11.2f}x", flush=True)
+    finally:
+        for pools in get_pools().values():
+            pools.close()
+        teardown_databases(databases, verbosity=0)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Сравнение режимов gunicorn на списке произведений.
+
+Для каждого режима (SERVER_MODE из gunicorn.conf.py) запускается сервер,
+после прогрева на него подаётся нагрузка из --concurrency потоков с
+keep-alive соединениями, и выводятся запросы в секунду и задержки.
+
+    python bench/serving.py --modes sync,gthread,asgi --duration 20
+
+Настройки базы и кэша берутся из окружения, как у самого сервера;
+RESPONSE_CACHE_TIMEOUT=0 измеряет работу без кэша ответов.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from common import percentile
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_yamdb"
+)
+
+
+def wait_ready(port, path, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, 2)
+            connection.request("GET", path)
+            if connection.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер на порту {port} не ответил за {timeout} с")
+
+
+def start_server(mode, port, options):
+    env = dict(os.environ)
+    env.update(SERVER_MODE=mode, GUNICORN_BIND=f"127.0.0.1:{port}")
+    if options.workers:
+        env["GUNICORN_WORKERS"] = str(options.workers)
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py"],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def hammer(port, path, deadline, latencies, errors):
+    connection = http.client.HTTPConnection("127.0.0.1", port, 30)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, 30)
+            continue
+        if response.status != 200:
+            errors.append(response.status)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def run_load(port, path, concurrency, duration):
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=hammer, args=(port, path, deadline, latencies, errors)
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_mode(mode, options):
+    port = free_port()
+    server = start_server(mode, port, options)
+    try:
+        wait_ready(port, options.path, options.startup_timeout)
+        run_load(port, options.path, options.concurrency, options.warmup)
+        return run_load(
+            port, options.path, options.concurrency, options.duration
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="sync,gthread,asgi")
+    parser.add_argument("--path", default="/api/v1/titles/")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="GUNICORN_WORKERS; 0 - значение по умолчанию gunicorn.conf.py.",
+    )
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    parser.add_argument("--json", help="Файл для результатов в JSON.")
+    options = parser.parse_args()
+
+    results = {}
+    print(f"{'режим':<10}{'запросов/с':>12}{'p50, мс':>10}"
+          f"{'p99, мс':>10}{'ошибок':>8}")
+    for mode in options.modes.split(","):
+        result = results[mode] = bench_mode(mode, options)
+        print(f"{mode:<10}{result['rps']:>12}{result['p50_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['errors']:>8}", flush=True)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
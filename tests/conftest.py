@@ -1,9 +1,30 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def close_db_pools(django_db_setup):
+    # Свободные соединения пула держат тестовую базу, и её нельзя удалить.
+    yield
+    from api_yamdb.db_pool import get_pools
+
+    for pools in get_pools().values():
+        pools.close()
@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.fixture
+def no_response_cache(settings):
+    # Кэш сбрасывается после фиксации, а тест идёт в одной транзакции.
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from reviews.models import Title
+
+    title = Title.objects.create(
+        name='Побег из Шоушенка', year=1994, category=category
+    )
+    title.genre.set(genres)
+    return title
@@ -0,0 +1,90 @@
+import pytest
+from api import authentication, signals
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def client_with(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+class TestClaimsAuthentication:
+
+    @pytest.mark.django_db
+    def test_user_is_not_loaded_from_database(self, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert not any(
+            'reviews_customuser' in query['sql']
+            for query in context.captured_queries
+        )
+
+    @pytest.mark.django_db
+    def test_privileged_token_version_is_read_from_database(
+        self, admin_client
+    ):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert any(
+            'token_version' in query['sql']
+            for query in context.captured_queries
+        )
+
+    @pytest.mark.django_db
+    def test_legacy_token_without_claims(self, admin):
+        client = client_with(AccessToken.for_user(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+
+    @pytest.mark.django_db
+    def test_tampered_token_is_rejected(self, user):
+        token = str(AccessToken.for_user(user))
+        header, payload, signature = token.split('.')
+        client = client_with('.'.join((header, payload, signature[::-1])))
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_role_change_revokes_tokens(self, admin, admin_client):
+        assert admin_client.get('/api/v1/users/').status_code == 200
+
+        admin.role = 'user'
+        admin.save()
+
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 401
+        assert response.data['code'] == 'token_revoked'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_profile_edit_keeps_tokens(self, user, user_client):
+        response = user_client.patch('/api/v1/users/me/', {'bio': 'Читаю'})
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_revocation_is_immediate_across_workers(
+        self, monkeypatch, admin, admin_client
+    ):
+        # Два воркера со своим locmem: отзыв проходит через второй.
+        first = LocMemCache('worker-1', {})
+        second = LocMemCache('worker-2', {})
+        monkeypatch.setattr(authentication, 'cache', first)
+        assert admin_client.get('/api/v1/users/').status_code == 200
+        authentication.remember_token_version(admin)
+
+        monkeypatch.setattr(authentication, 'cache', second)
+        monkeypatch.setattr(signals, 'cache', second)
+        admin.role = 'user'
+        admin.save()
+
+        monkeypatch.setattr(authentication, 'cache', first)
+        monkeypatch.setattr(signals, 'cache', first)
+        assert first.get(authentication.version_key(admin.pk)) is not None
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 401
+        assert response.data['code'] == 'token_revoked'
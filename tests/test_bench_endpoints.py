@@ -0,0 +1,66 @@
+import importlib.util
+import os
+import sys
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+BENCH_DIR = os.path.join(os.path.dirname(settings.BASE_DIR), 'bench')
+PATH = os.path.join(BENCH_DIR, 'endpoints.py')
+
+
+@pytest.fixture(scope='module')
+def bench():
+    # Скрипты бенчмарков импортируют общие функции из своего каталога.
+    sys.path.insert(0, BENCH_DIR)
+    try:
+        spec = importlib.util.spec_from_file_location('bench_endpoints', PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(BENCH_DIR)
+    return module
+
+
+def test_every_route_has_scenario(bench):
+    assert bench.uncovered_routes(bench.scenarios()) == set()
+
+
+@pytest.mark.django_db
+def test_suite_runs_on_small_dataset(bench):
+    call_command(
+        'seed_data', users=5, categories=2, genres=3, titles=4, reviews=10,
+        comments=20, stdout=StringIO(),
+    )
+    routes = bench.run_suite(iterations=2, output=lambda line: None)
+    assert set(routes) == {scenario.name for scenario in bench.scenarios()}
+    for result in routes.values():
+        assert 0 < result['p50_ms'] <= result['p99_ms']
+        assert result['queries'] >= 0
+        assert result['alloc_kib'] > 0
+
+
+def test_compare_reports_regressions(bench):
+    baseline = {'routes': {
+        'titles-list': {'p95_ms': 10.0, 'queries': 3, 'alloc_kib': 500.0},
+    }}
+    same = {'titles-list': {'p95_ms': 11.0, 'queries': 3, 'alloc_kib': 520}}
+    assert bench.compare(same, baseline, tolerance=0.2) == []
+    worse = {'titles-list': {'p95_ms': 13.0, 'queries': 4, 'alloc_kib': 700}}
+    assert len(bench.compare(worse, baseline, tolerance=0.2)) == 3
+    new = {'genres-list': {'p95_ms': 1.0, 'queries': 9, 'alloc_kib': 1}}
+    assert bench.compare(new, baseline, tolerance=0.2) == []
+
+
+def test_compare_requires_same_conditions(bench):
+    meta = {
+        'sizes': {'titles': 10}, 'seed': 42, 'database': 'postgresql',
+        'response_cache': False, 'iterations': 30,
+    }
+    baseline = {'meta': dict(meta, iterations=10), 'routes': {}}
+    assert bench.meta_mismatch(meta, baseline) == []
+    baseline['meta'].update(sizes={'titles': 20}, response_cache=True)
+    assert len(bench.meta_mismatch(meta, baseline)) == 2
+    assert len(bench.meta_mismatch(meta, {'routes': {}})) == 4
@@ -0,0 +1,52 @@
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from reviews.models import Comment, CustomUser, GenreTitle, Review, Title
+
+FIXTURE = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'infra', 'fixtures.json'
+)
+
+
+@pytest.mark.django_db
+class TestBulkLoaddata:
+
+    def test_loads_catalog_from_fixture(self):
+        out = StringIO()
+        call_command('bulk_loaddata', FIXTURE, batch_size=7, stdout=out)
+
+        assert CustomUser.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert GenreTitle.objects.count() == 42
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        assert Review.objects.get(pk=1).pub_date.year == 2022
+        assert 'объектов/с' in out.getvalue()
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count()
+        assert not Review.objects.stale_comments().exists()
+
+    def test_loads_many_to_many_and_recounts_scores(self, tmp_path):
+        fixture = tmp_path / 'fixture.json'
+        fixture.write_text(json.dumps([
+            {'model': 'reviews.review', 'pk': 1, 'fields': {
+                'author': 1, 'title': 1, 'text': 'Текст', 'score': 9,
+                'pub_date': '2022-08-02T15:18:48.555Z'}},
+            {'model': 'reviews.genre', 'pk': 1,
+             'fields': {'name': 'Драма', 'slug': 'drama'}},
+            {'model': 'reviews.title', 'pk': 1, 'fields': {
+                'name': 'Фильм', 'year': 1994, 'rating': None,
+                'genre': [1]}},
+            {'model': 'reviews.customuser', 'pk': 1, 'fields': {
+                'username': 'author', 'email': 'author@yamdb.fake'}},
+        ]), encoding='utf-8')
+
+        call_command('bulk_loaddata', str(fixture), stdout=StringIO())
+
+        title = Title.objects.get(pk=1)
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
+        assert (title.score_sum, title.review_count) == (9, 1)
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+URL = '/api/v1/titles/bulk/'
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    def test_creates_titles_with_genres(self, admin_client, category, genres):
+        payload = [
+            {'name': 'Амели', 'year': 2001, 'category': 'movie',
+             'genre': ['drama', 'comedy']},
+            {'name': 'Брат', 'year': 1997, 'genre': ['drama']},
+        ]
+        response = admin_client.post(URL, payload, format='json')
+        assert response.status_code == 200, response.data
+        results = response.data['results']
+        assert [result['status'] for result in results] == [
+            'created', 'created'
+        ]
+        amelie = Title.objects.get(pk=results[0]['id'])
+        assert amelie.category == category
+        assert sorted(amelie.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+        assert Title.objects.get(name='Брат').category is None
+
+    def test_errors_do_not_abort_valid_items(self, admin_client, genres):
+        payload = [
+            {'name': 'Амели', 'year': 2001, 'genre': ['drama']},
+            {'name': 'Из будущего', 'year': 3000},
+            {'name': 'Без жанра', 'year': 2001, 'genre': ['unknown']},
+            {'name': 'Без категории', 'year': 2001, 'category': 'unknown'},
+        ]
+        response = admin_client.post(URL, payload, format='json')
+        assert response.status_code == 200, response.data
+        results = response.data['results']
+        assert results[0]['status'] == 'created'
+        assert 'year' in results[1]['errors']
+        assert 'genre' in results[2]['errors']
+        assert 'category' in results[3]['errors']
+        assert list(Title.objects.values_list('name', flat=True)) == ['Амели']
+
+    def test_updates_titles_with_id(self, admin_client, title):
+        payload = [
+            {'id': title.pk, 'name': 'Зелёная миля', 'year': 1999,
+             'genre': ['comedy']},
+            {'id': title.pk, 'name': 'Дубль', 'year': 1999},
+            {'id': title.pk + 100, 'name': 'Нет такого', 'year': 1999},
+        ]
+        response = admin_client.post(URL, payload, format='json')
+        results = response.data['results']
+        assert results[0] == {'status': 'updated', 'id': title.pk}
+        assert 'id' in results[1]['errors']
+        assert 'id' in results[2]['errors']
+        title.refresh_from_db()
+        assert title.name == 'Зелёная миля'
+        assert title.category is None
+        assert list(title.genre.values_list('slug', flat=True)) == ['comedy']
+
+    def test_query_count_does_not_grow_with_items(self, admin_client,
+                                                  category, genres):
+        payload = [
+            {'name': f'Фильм {i}', 'year': 2000, 'category': 'movie',
+             'genre': ['drama', 'comedy']}
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, payload, format='json')
+        assert response.status_code == 200, response.data
+        assert Title.objects.count() == 20
+        assert sorted(
+            item['id'] for item in response.data['results']
+        ) == sorted(Title.objects.values_list('pk', flat=True))
+        # Версия токена, категории, жанры, вставка произведений и связей;
+        # без RETURNING id новых произведений выбираются отдельно.
+        budget = 7
+        if not connection.features.can_return_ids_from_bulk_insert:
+            budget += 1
+        assert len(context.captured_queries) <= budget
+
+    def test_requires_admin_and_list(self, user_client, admin_client):
+        assert user_client.post(URL, [], format='json').status_code == 403
+        response = admin_client.post(URL, {'name': 'Амели'}, format='json')
+        assert response.status_code == 400
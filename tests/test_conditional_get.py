@@ -0,0 +1,131 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Genre, Review
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title, author=user, text='Текст', score=8
+    )
+
+
+@pytest.fixture
+def comment(review, another_user):
+    comment = Comment.objects.create(
+        review=review, author=another_user, text='Текст'
+    )
+    Review.objects.filter(pk=review.pk).add_comments(1)
+    return comment
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('no_response_cache')
+class TestConditionalGet:
+
+    def test_if_none_match_returns_304_without_serializing(
+        self, review, guest_client
+    ):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response, _ = get(guest_client, url)
+        assert response.status_code == 200
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+
+        not_modified, queries = get(
+            guest_client, url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert not_modified.status_code == 304
+        assert not_modified['ETag'] == response['ETag']
+        assert not not_modified.content
+        assert queries == 1
+
+    def test_if_modified_since_returns_304(self, comment, guest_client):
+        url = (
+            f'/api/v1/titles/{comment.review.title_id}/reviews/'
+            f'{comment.review_id}/comments/{comment.pk}/'
+        )
+        response, _ = get(guest_client, url)
+        not_modified, _ = get(
+            guest_client, url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        assert not_modified.status_code == 304
+
+    def test_deletion_changes_list_etag(self, review, guest_client):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response, _ = get(guest_client, url)
+        review.delete()
+        response, _ = get(
+            guest_client, url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 200
+        assert response.data['count'] == 0
+
+    def test_comment_deletion_moves_parent_review(
+        self, comment, another_user_client
+    ):
+        review = comment.review
+        updated_at = review.updated_at
+        response = another_user_client.delete(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            f'comments/{comment.pk}/'
+        )
+        assert response.status_code == 204
+        review.refresh_from_db()
+        assert review.updated_at > updated_at
+
+    def test_new_review_changes_title_validators(
+        self, title, user_client, guest_client
+    ):
+        url = f'/api/v1/titles/{title.pk}/'
+        response, _ = get(guest_client, url)
+        user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'Ок', 'score': 7}
+        )
+        response, _ = get(
+            guest_client, url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 200
+        assert response.data['rating'] == 7
+
+    def test_genre_rename_changes_title_validators(
+        self, title, guest_client
+    ):
+        url = '/api/v1/titles/'
+        response, _ = get(guest_client, url)
+        assert not response.has_header('Last-Modified')
+
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+
+        response, _ = get(
+            guest_client, url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 200
+        assert 'Трагедия' in str(response.data)
+
+    def test_missing_object_is_not_found(self, title, guest_client):
+        response, _ = get(
+            guest_client, f'/api/v1/titles/{title.pk + 1}/',
+            HTTP_IF_NONE_MATCH='"stale"',
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cached_response_keeps_validators(title, guest_client):
+    response, _ = get(guest_client, '/api/v1/titles/')
+    not_modified, queries = get(
+        guest_client, '/api/v1/titles/', HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert not_modified.status_code == 304
+    assert queries == 0
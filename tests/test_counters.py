@@ -0,0 +1,85 @@
+import pytest
+from reviews.models import Review, Title
+
+
+def reviews_url(title):
+    return f'/api/v1/titles/{title.pk}/reviews/'
+
+
+def comments_url(review):
+    return f'{reviews_url(review.title)}{review.pk}/comments/'
+
+
+@pytest.fixture
+def review(title, user_client, user):
+    response = user_client.post(
+        reviews_url(title), {'text': 'Отлично', 'score': 9}
+    )
+    assert response.status_code == 201, response.data
+    return Review.objects.get(pk=response.data['id'])
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('no_response_cache')
+class TestCounters:
+
+    def test_reviews_count_follows_review_writes(
+        self, review, user_client, guest_client
+    ):
+        url = f'/api/v1/titles/{review.title_id}/'
+        assert guest_client.get(url).data['reviews_count'] == 1
+
+        user_client.delete(f'{reviews_url(review.title)}{review.pk}/')
+        assert guest_client.get(url).data['reviews_count'] == 0
+
+    def test_comments_count_follows_comment_writes(
+        self, review, user_client, another_user_client
+    ):
+        url = comments_url(review)
+        another_user_client.post(url, {'text': 'Согласен'})
+        response = user_client.post(url, {'text': 'Спасибо'})
+        assert response.status_code == 201, response.data
+
+        detail = f'{reviews_url(review.title)}{review.pk}/'
+        assert user_client.get(detail).data['comments_count'] == 2
+
+        user_client.delete(f'{url}{response.data["id"]}/')
+        assert user_client.get(detail).data['comments_count'] == 1
+
+    def test_user_deletion_updates_parents(
+        self, title, review, another_user, another_user_client
+    ):
+        another_user_client.post(
+            reviews_url(title), {'text': 'Так себе', 'score': 3}
+        )
+        another_user_client.post(comments_url(review), {'text': 'Не согласен'})
+
+        another_user.delete()
+
+        title.refresh_from_db()
+        review.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (9, 1)
+        assert review.comments_count == 0
+        assert not Title.objects.stale_scores().exists()
+
+    def test_sorting_by_counters(
+        self, title, review, another_user_client, guest_client
+    ):
+        empty = Title.objects.create(name='Без отзывов', year=2000)
+        response = guest_client.get(
+            '/api/v1/titles/', {'ordering': '-reviews_count'}
+        )
+        assert [item['id'] for item in response.data['results']] == [
+            title.pk, empty.pk
+        ]
+
+        other = another_user_client.post(
+            reviews_url(title), {'text': 'Так себе', 'score': 3}
+        ).data
+        another_user_client.post(comments_url(review), {'text': 'Да'})
+        response = guest_client.get(
+            reviews_url(title), {'ordering': 'comments_count'}
+        )
+        assert [item['id'] for item in response.data['results']] == [
+            other['id'], review.pk
+        ]
@@ -0,0 +1,73 @@
+import psycopg2
+import pytest
+from django.conf import settings
+from psycopg2.extensions import make_dsn
+
+from api_yamdb.db_pool import ConnectionPools, PooledConnection
+
+database = settings.DATABASES['default']
+pytestmark = pytest.mark.skipif(
+    database['ENGINE'] != 'django.db.backends.postgresql',
+    reason='Пул работает только с PostgreSQL',
+)
+DSN = make_dsn(
+    dbname='postgres',
+    user=database['USER'],
+    password=database['PASSWORD'],
+    host=database['HOST'],
+    port=database['PORT'],
+)
+
+
+@pytest.fixture
+def pools():
+    pools = ConnectionPools(size=1, timeout=0.1, check_after=0)
+    yield pools
+    pools.close()
+
+
+class TestConnectionPool:
+
+    def test_closed_connection_is_reused(self, pools):
+        first = pools(DSN)
+        assert isinstance(first, PooledConnection)
+        first.close()
+        assert not first.closed
+        assert pools(DSN) is first
+        stats = pools.stats.as_dict()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['setup_max_ms'] > 0
+
+    def test_pool_is_bounded(self, pools):
+        first = pools(DSN)
+        with pytest.raises(psycopg2.OperationalError):
+            pools(DSN)
+        assert pools.stats.as_dict()['timeouts'] == 1
+        first.close()
+        assert pools(DSN) is first
+
+    def test_dead_connection_is_replaced(self, pools):
+        first = pools(DSN)
+        pid = first.get_backend_pid()
+        first.close()
+        killer = psycopg2.connect(DSN)
+        killer.autocommit = True
+        with killer.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        killer.close()
+
+        second = pools(DSN)
+        assert second is not first
+        assert second.get_backend_pid() != pid
+        assert pools.stats.as_dict()['health_failures'] == 1
+
+    def test_open_transaction_is_rolled_back(self, pools):
+        first = pools(DSN)
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        first.close()
+        assert (
+            pools(DSN).info.transaction_status
+            == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
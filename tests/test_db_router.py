@@ -0,0 +1,60 @@
+import pytest
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory
+from reviews.models import Title
+
+from api_yamdb.db_router import ReplicaMiddleware
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+    settings.REPLICA_STICKY_SECONDS = 5
+    return settings.DATABASE_REPLICAS
+
+
+def read_alias(method, status=200, token='Bearer reader'):
+    seen = {}
+
+    def view(request):
+        seen['read'] = router.db_for_read(Title)
+        seen['write'] = router.db_for_write(Title)
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)(
+        '/api/v1/titles/', HTTP_AUTHORIZATION=token
+    )
+    ReplicaMiddleware(view)(request)
+    return seen['read'], seen['write']
+
+
+class TestReplicaRouting:
+
+    def test_safe_requests_read_from_replica(self, replicas):
+        read, write = read_alias('get')
+        assert read in replicas
+        assert write == 'default'
+
+    def test_writes_use_primary_only(self, replicas):
+        assert read_alias('post') == ('default', 'default')
+
+    def test_reads_stick_to_primary_after_write(self, replicas):
+        read_alias('patch', token='Bearer writer')
+        assert read_alias('get', token='Bearer writer')[0] == 'default'
+        assert read_alias('get', token='Bearer other')[0] in replicas
+
+    def test_failed_write_does_not_stick(self, replicas):
+        read_alias('post', status=400, token='Bearer writer')
+        assert read_alias('get', token='Bearer writer')[0] in replicas
+
+    def test_outside_requests_use_primary(self, replicas):
+        assert router.db_for_read(Title) == 'default'
+
+    def test_without_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        assert read_alias('get') == ('default', 'default')
+
+    def test_replicas_are_not_migrated(self, replicas):
+        assert not router.allow_migrate('replica1', 'reviews')
+        assert router.allow_migrate('default', 'reviews')
@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+LIMIT = 2
+
+
+@pytest.fixture
+def catalog(settings, django_user_model, category):
+    settings.EXPAND_LIMIT = LIMIT
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{i}', email=f'a{i}@yamdb.fake'
+        )
+        for i in range(4)
+    ]
+    titles = [
+        Title.objects.create(name=f'Произведение {i}', year=2000)
+        for i in range(3)
+    ]
+    for title in titles:
+        for author in authors[:titles.index(title) + 2]:
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=5
+            )
+    for review in Review.objects.all():
+        for author in authors[:3]:
+            Comment.objects.create(review=review, author=author, text='Да')
+    return titles
+
+
+def newest(queryset):
+    return list(
+        queryset.order_by('-pub_date', '-id').values_list('pk', flat=True)
+    )[:LIMIT]
+
+
+@pytest.mark.django_db
+class TestExpand:
+
+    def test_titles_embed_newest_reviews(self, catalog, guest_client):
+        response = guest_client.get('/api/v1/titles/', {'expand': 'reviews'})
+        assert response.status_code == 200, response.data
+        for item in response.data['results']:
+            title = Title.objects.get(pk=item['id'])
+            assert [r['id'] for r in item['reviews']] == newest(
+                title.reviews.all()
+            )
+            assert all('comments' not in r for r in item['reviews'])
+
+    def test_nested_comments(self, catalog, guest_client):
+        title = catalog[-1]
+        response = guest_client.get(
+            f'/api/v1/titles/{title.pk}/', {'expand': 'reviews.comments'}
+        )
+        assert response.status_code == 200, response.data
+        assert len(response.data['reviews']) == LIMIT
+        for item in response.data['reviews']:
+            review = Review.objects.get(pk=item['id'])
+            assert [c['id'] for c in item['comments']] == newest(
+                review.comments.all()
+            )
+        assert 'ETag' not in response
+
+    def test_reviews_embed_comments(self, catalog, guest_client):
+        title = catalog[0]
+        response = guest_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/', {'expand': 'comments'}
+        )
+        assert response.status_code == 200, response.data
+        for item in response.data['results']:
+            assert len(item['comments']) == LIMIT
+
+    def test_without_expand(self, catalog, guest_client):
+        response = guest_client.get(f'/api/v1/titles/{catalog[0].pk}/')
+        assert 'reviews' not in response.data
+
+    @pytest.mark.parametrize('value', ['comments', 'reviews.author', 'x'])
+    def test_unknown_path(self, catalog, guest_client, value):
+        response = guest_client.get('/api/v1/titles/', {'expand': value})
+        assert response.status_code == 400
+        assert 'expand' in response.data
+
+    def test_queries_do_not_depend_on_page_size(
+        self, catalog, guest_client
+    ):
+        counts = []
+        for limit in (1, len(catalog)):
+            with CaptureQueriesContext(connection) as context:
+                guest_client.get(
+                    '/api/v1/titles/',
+                    {'expand': 'reviews.comments', 'limit': limit},
+                )
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1]
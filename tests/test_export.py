@@ -0,0 +1,98 @@
+import datetime
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from reviews.models import Comment, Review, Title
+
+URL = '/api/v1/export/'
+
+
+@pytest.fixture
+def catalog(title, user, another_user):
+    Title.objects.create(name='Без категории', year=2001)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(review=review, author=another_user, text='Да')
+    return title, review
+
+
+def read_lines(content):
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def export(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == 'application/x-ndjson'
+    return read_lines(b''.join(response.streaming_content))
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+
+    def test_full_export(self, catalog, admin_client):
+        title, review = catalog
+        lines = export(admin_client)
+        assert [line['type'] for line in lines] == [
+            'title', 'title', 'review', 'comment'
+        ]
+        assert lines[0]['id'] == title.pk
+        assert lines[0]['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert [genre['slug'] for genre in lines[0]['genre']] == [
+            'drama', 'comedy'
+        ]
+        assert lines[1]['category'] is None
+        assert lines[2]['title'] == title.pk
+        assert lines[2]['author'] == review.author.username
+        assert lines[3]['review'] == review.pk
+
+    def test_since(self, catalog, admin_client):
+        old = timezone.now() - datetime.timedelta(days=10)
+        Title.objects.exclude(pk=catalog[0].pk).update(updated_at=old)
+        Comment.objects.update(updated_at=old)
+        since = (old + datetime.timedelta(days=1)).isoformat()
+        lines = export(admin_client, since=since)
+        assert [line['type'] for line in lines] == ['title', 'review']
+
+    def test_invalid_since(self, catalog, admin_client):
+        response = admin_client.get(URL, {'since': 'вчера'})
+        assert response.status_code == 400
+        assert 'since' in response.data
+
+    def test_gzip(self, catalog, admin_client):
+        response = admin_client.get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        content = gzip.decompress(b''.join(response.streaming_content))
+        assert len(read_lines(content)) == 4
+
+    @pytest.mark.parametrize('client, status', [
+        ('guest_client', 401), ('user_client', 403), ('moderator_client', 403)
+    ])
+    def test_admin_only(self, catalog, request, client, status):
+        client = request.getfixturevalue(client)
+        assert client.get(URL).status_code == status
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+
+    def test_matches_endpoint(self, catalog, admin_client, tmp_path):
+        output = tmp_path / 'catalog.ndjson.gz'
+        call_command(
+            'export_catalog', output=str(output), gzip=True, chunk_size=1,
+            stderr=io.StringIO(),
+        )
+        with gzip.open(output) as file:
+            assert read_lines(file.read()) == export(admin_client)
+
+    def test_invalid_since(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command(
+                'export_catalog', output=str(tmp_path / 'out'), since='x'
+            )
@@ -0,0 +1,137 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.management.commands.import_csv import Command, file_checksum
+from reviews.models import (Comment, CustomUser, Genre, ImportCheckpoint,
+                            Review, Title)
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    @pytest.mark.parametrize('options', [{}, {'no_copy': True}])
+    def test_import_loads_all_files(self, options):
+        out = StringIO()
+        call_command('import_csv', batch_size=10, stdout=out, **options)
+
+        assert CustomUser.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, 'Дата берётся из файла'
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count()
+        assert not Review.objects.stale_comments().exists()
+        assert 'строк/с' in out.getvalue()
+
+    def test_clear_deletes_without_loading_rows(
+        self, django_assert_max_num_queries
+    ):
+        call_command('import_csv', stdout=StringIO())
+        assert Comment.objects.exists()
+        # По одному DELETE на таблицу и точка сохранения транзакции.
+        with django_assert_max_num_queries(13):
+            Command().clear(False)
+        assert not CustomUser.objects.exists()
+        assert not Title.genre.through.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_replaces_data_and_resets_sequences(self):
+        call_command('import_csv', stdout=StringIO())
+        call_command('import_csv', truncate=True, stdout=StringIO())
+
+        assert Title.objects.count() == 32
+        user = CustomUser.objects.create(username='new', email='n@n.fake')
+        assert user.pk > 100
+
+
+@pytest.fixture
+def data_dir(tmp_path, settings):
+    source = os.path.join(settings.BASE_DIR, 'static', 'data')
+    for name in os.listdir(source):
+        shutil.copy(os.path.join(source, name), tmp_path / name)
+    return tmp_path
+
+
+def rewrite(path, change):
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        fieldnames, rows = reader.fieldnames, list(reader)
+    rows = change(rows)
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.django_db
+class TestImportCsvDelta:
+
+    def test_delta_touches_only_changed_rows(self, data_dir):
+        call_command('import_csv', data_dir=data_dir, stdout=StringIO())
+
+        def rename(rows):
+            rows[0]['name'] = 'Новое название'
+            return rows
+
+        rewrite(data_dir / 'titles.csv', rename)
+        rewrite(data_dir / 'comments.csv', lambda rows: rows[1:])
+        rewrite(data_dir / 'review.csv', lambda rows: [
+            dict(row, score='1') if row['id'] == '1' else row for row in rows
+        ])
+        out = StringIO()
+        call_command(
+            'import_csv', data_dir=data_dir, delta=True, stdout=out
+        )
+
+        output = out.getvalue()
+        assert 'titles.csv: добавлено 0, изменено 1, удалено 0' in output
+        assert 'comments.csv: добавлено 0, изменено 0, удалено 1' in output
+        assert 'review.csv: добавлено 0, изменено 1, удалено 0' in output
+        assert 'genre.csv: добавлено 0, изменено 0, удалено 0' in output
+        assert Title.objects.get(pk=1).name == 'Новое название'
+        assert Comment.objects.count() == 2
+        title = Title.objects.get(pk=1)
+        assert title.score_sum == sum(
+            title.reviews.values_list('score', flat=True)
+        )
+        assert not ImportCheckpoint.objects.exists()
+
+    def test_delta_resumes_from_checkpoint(self, data_dir):
+        call_command('import_csv', data_dir=data_dir, stdout=StringIO())
+        rewrite(data_dir / 'genre.csv', lambda rows: [
+            dict(row, name=row['name'].upper()) for row in rows
+        ])
+        # Прерванный запуск: первые 10 жанров уже записаны.
+        for genre in Genre.objects.order_by('pk')[:10]:
+            genre.name = genre.name.upper()
+            genre.save()
+        for name in ('users.csv', 'category.csv'):
+            ImportCheckpoint.objects.create(
+                source=name, checksum=file_checksum(data_dir / name),
+                finished=True,
+            )
+        ImportCheckpoint.objects.create(
+            source='genre.csv',
+            checksum=file_checksum(data_dir / 'genre.csv'),
+            position=10,
+        )
+
+        out = StringIO()
+        call_command(
+            'import_csv', data_dir=data_dir, delta=True, batch_size=4,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        assert 'users.csv: уже синхронизирован' in output
+        assert 'genre.csv: добавлено 0, изменено 5, удалено 0' in output
+        assert all(
+            name == name.upper()
+            for name in Genre.objects.values_list('name', flat=True)
+        )
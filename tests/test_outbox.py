@@ -0,0 +1,80 @@
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import OutboxEmail
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+def send_outbox(*args):
+    call_command('send_outbox', *args, stdout=StringIO(), stderr=StringIO())
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_only_enqueues_email(self, guest_client, mailoutbox):
+        response = guest_client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'reader', 'email': 'reader@yamdb.fake'},
+        )
+        assert response.status_code == 200, response.data
+        assert mailoutbox == []
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'reader@yamdb.fake'
+        assert email.sent is None
+
+    def test_batch_is_sent_over_one_connection(self, settings, mailoutbox):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.CountingBackend'
+        CountingBackend.opened = 0
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(subject='Код', body='1234', recipient=f'{i}@y.fake')
+            for i in range(3)
+        )
+        send_outbox()
+        assert len(mailoutbox) == 3
+        assert CountingBackend.opened == 1
+        assert not OutboxEmail.objects.filter(sent__isnull=True).exists()
+
+    def test_failure_is_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        email = OutboxEmail.objects.create(
+            subject='Код', body='1234', recipient='reader@yamdb.fake'
+        )
+        send_outbox()
+        email.refresh_from_db()
+        assert email.attempts == 1
+        assert not email.failed
+        assert email.next_attempt > timezone.now()
+        assert 'Сервер недоступен' in email.last_error
+
+        # Письмо отложено: повторный запуск его не трогает.
+        send_outbox()
+        email.refresh_from_db()
+        assert email.attempts == 1
+
+    def test_gives_up_after_max_attempts(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        email = OutboxEmail.objects.create(
+            subject='Код', body='1234', recipient='reader@yamdb.fake'
+        )
+        send_outbox('--max-attempts', '1')
+        email.refresh_from_db()
+        assert email.failed
@@ -0,0 +1,62 @@
+import pytest
+from django.utils import timezone
+from reviews.models import Comment, Review
+
+
+@pytest.fixture
+def comments(title, user):
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user, text=f'Комментарий {i}')
+        for i in range(7)
+    )
+    # Одинаковая дата у части записей: порядок решает id.
+    Comment.objects.filter(
+        pk__in=list(review.comments.values_list('pk', flat=True)[:4])
+    ).update(pub_date=timezone.now())
+    return review
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def url(self, review):
+        return (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/comments/'
+        )
+
+    def test_cursor_walks_forward_and_back(self, comments, guest_client):
+        expected = list(
+            comments.comments.order_by('pub_date', 'id')
+            .values_list('id', flat=True)
+        )
+        response = guest_client.get(
+            self.url(comments), {'cursor': '', 'limit': 3}
+        )
+        assert response.status_code == 200
+        assert response.data['previous'] is None
+        assert 'count' not in response.data
+
+        seen, pages = [], []
+        while True:
+            ids = [item['id'] for item in response.data['results']]
+            seen.extend(ids)
+            pages.append(ids)
+            if response.data['next'] is None:
+                break
+            response = guest_client.get(response.data['next'])
+        assert seen == expected
+
+        previous = guest_client.get(response.data['previous'])
+        assert [item['id'] for item in previous.data['results']] == pages[-2]
+
+    def test_limit_offset_is_default(self, comments, guest_client):
+        response = guest_client.get(self.url(comments), {'limit': 2})
+        assert response.data['count'] == 7
+        assert len(response.data['results']) == 2
+
+    def test_invalid_cursor(self, comments, guest_client):
+        response = guest_client.get(self.url(comments), {'cursor': 'junk'})
+        assert response.status_code == 404
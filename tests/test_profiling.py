@@ -0,0 +1,89 @@
+import json
+import logging
+import pstats
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+
+from api_yamdb.profiling import ProfilingMiddleware
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def profiling(settings, tmp_path, no_response_cache):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.PROFILING_TOKEN = 'secret'
+    settings.PROFILING_DIR = str(tmp_path)
+    return tmp_path
+
+
+def server_timing(response):
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+def log_records(caplog):
+    return [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'api_yamdb.profiling'
+    ]
+
+
+def test_disabled_middleware_is_skipped(settings):
+    settings.PROFILING_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+class TestProfiling:
+
+    def test_no_header_when_disabled(self, settings, title, guest_client):
+        settings.PROFILING_ENABLED = False
+        response = guest_client.get(URL)
+        assert not response.has_header('Server-Timing')
+
+    def test_server_timing_and_log(self, profiling, title, user_client,
+                                   caplog):
+        caplog.set_level(logging.INFO, logger='api_yamdb.profiling')
+        response = user_client.get(URL)
+
+        assert response.status_code == 200
+        metrics = server_timing(response)
+        assert list(metrics) == [
+            'db', 'auth', 'serialize', 'view', 'render', 'total'
+        ]
+        durations = {
+            name: float(params['dur']) for name, params in metrics.items()
+        }
+        assert durations['serialize'] <= durations['view']
+        assert durations['view'] <= durations['total']
+        [record] = log_records(caplog)
+        assert record['path'] == URL
+        assert record['status'] == 200
+        assert record['profile'] is None
+        assert metrics['db']['desc'] == f'"{record["queries"]} queries"'
+        assert record['queries'] > 0
+
+    def test_cprofile_by_header(self, profiling, title, guest_client,
+                                caplog):
+        caplog.set_level(logging.INFO, logger='api_yamdb.profiling')
+        guest_client.get(URL, HTTP_X_PROFILE='wrong')
+        assert not list(profiling.iterdir())
+
+        guest_client.get(URL, HTTP_X_PROFILE='secret')
+        [dump] = profiling.iterdir()
+        assert log_records(caplog)[-1]['profile'] == dump.name
+        assert pstats.Stats(str(dump)).total_calls > 0
+
+    def test_cprofile_sampling(self, profiling, settings, title,
+                               guest_client):
+        settings.PROFILING_SAMPLE_RATE = 1
+        guest_client.get(URL)
+        guest_client.get('/api/v1/genres/')
+        assert len(list(profiling.iterdir())) == 2
@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Genre, Review, Title
+
+ROWS = 20
+
+# Бюджет запросов к БД на маршрут. Пользователь берётся из claims токена,
+# но токен администратора требует запроса версии токенов; для
+# произведений, отзывов и комментариев учтён запрос валидаторов ETag и
+# Last-Modified.
+QUERY_BUDGETS = {
+    'users-list': 3,
+    'users-detail': 2,
+    'users-me': 2,
+    'genres-list': 3,
+    'categories-list': 3,
+    'titles-list': 5,
+    'titles-detail': 4,
+    'reviews-list': 4,
+    'reviews-detail': 3,
+    'comments-list': 4,
+    'comments-detail': 3,
+}
+
+
+@pytest.fixture
+def catalog(django_user_model, category, title):
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{i}', email=f'a{i}@yamdb.fake'
+        )
+        for i in range(ROWS)
+    ]
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(ROWS)
+    )
+    for i in range(ROWS):
+        extra = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=category
+        )
+        extra.genre.set(Genre.objects.all()[:3])
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Текст', score=5)
+        for author in authors
+    )
+    review = Review.objects.filter(title=title).first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Текст')
+        for author in authors
+    )
+    return title, review
+
+
+def route_urls(title, review, admin):
+    comment = review.comments.first()
+    return {
+        'users-list': '/api/v1/users/',
+        'users-detail': f'/api/v1/users/{admin.username}/',
+        'users-me': '/api/v1/users/me/',
+        'genres-list': '/api/v1/genres/',
+        'categories-list': '/api/v1/categories/',
+        'titles-list': '/api/v1/titles/',
+        'titles-detail': f'/api/v1/titles/{title.pk}/',
+        'reviews-list': f'/api/v1/titles/{title.pk}/reviews/',
+        'reviews-detail': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        ),
+        'comments-list': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        ),
+        'comments-detail': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            f'{comment.pk}/'
+        ),
+    }
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('route', sorted(QUERY_BUDGETS))
+    def test_route_within_budget(
+        self, route, catalog, admin, admin_client,
+        django_assert_max_num_queries
+    ):
+        url = route_urls(*catalog, admin)[route]
+        with django_assert_max_num_queries(QUERY_BUDGETS[route]):
+            response = admin_client.get(url, {'limit': ROWS})
+        assert response.status_code == 200, response.data
+
+    @pytest.mark.parametrize(
+        'route', [r for r in sorted(QUERY_BUDGETS) if r.endswith('-list')]
+    )
+    def test_list_queries_do_not_depend_on_page_size(
+        self, route, catalog, admin, admin_client
+    ):
+        url = route_urls(*catalog, admin)[route]
+        counts = []
+        for limit in (1, ROWS):
+            with CaptureQueriesContext(connection) as context:
+                admin_client.get(url, {'limit': limit})
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            f'Количество запросов на {url} растёт вместе с размером страницы'
+        )
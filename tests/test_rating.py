@@ -0,0 +1,52 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestRating:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.pk}/reviews/'
+
+    def test_rating_follows_review_writes(
+        self, title, user_client, another_user_client
+    ):
+        url = self.reviews_url(title)
+        first = user_client.post(url, {'text': 'Отлично', 'score': 10})
+        assert first.status_code == 201, first.data
+        another_user_client.post(url, {'text': 'Неплохо', 'score': 5})
+
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (15, 2)
+        assert title.rating == 8, 'Среднее 7.5 округляется вверх'
+
+        response = user_client.patch(
+            f'{url}{first.data["id"]}/', {'score': 1}
+        )
+        assert response.status_code == 200, response.data
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (6, 2)
+
+        response = user_client.delete(f'{url}{first.data["id"]}/')
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (5, 1)
+        assert title.rating == 5
+
+    def test_rating_without_reviews_is_none(self, title, guest_client):
+        response = guest_client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.data['rating'] is None
+
+    def test_recount_ratings_fixes_drift(self, title, user_client):
+        user_client.post(self.reviews_url(title), {'text': 'Ок', 'score': 7})
+        Title.objects.filter(pk=title.pk).update(score_sum=0, review_count=0)
+
+        call_command('recount_ratings', chunk_size=1, stdout=StringIO())
+
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            7, 1, 7
+        )
@@ -0,0 +1,104 @@
+import datetime
+import gzip
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+import msgpack
+import pytest
+from api.renderers import ORJSONRenderer
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+
+TITLES = 20
+
+
+@pytest.fixture
+def titles(category):
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(TITLES)
+    )
+
+
+class TestORJSONRenderer:
+
+    @pytest.mark.parametrize('data', [
+        OrderedDict([('b', 1), ('a', [None, True, 1.5, 'текст'])]),
+        {'date': datetime.datetime(2022, 6, 29, 18, 45, tzinfo=timezone.utc)},
+        {'day': datetime.date(2022, 6, 29), 'price': Decimal('1.10')},
+        {'lazy': gettext_lazy('Ошибка'), 'separator': 'a b c'},
+        {1: 'int key'},
+    ])
+    def test_same_bytes_as_json_renderer(self, data):
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_empty_body(self):
+        assert ORJSONRenderer().render(None) == b''
+
+
+@pytest.mark.django_db
+class TestNegotiation:
+
+    def test_json_by_default(self, titles, guest_client):
+        response = guest_client.get('/api/v1/titles/')
+        assert response['Content-Type'] == 'application/json'
+        assert json.loads(response.content)['count'] == TITLES
+
+    @pytest.mark.parametrize('params, headers', [
+        ({}, {'HTTP_ACCEPT': 'application/msgpack'}),
+        ({'format': 'msgpack'}, {}),
+    ])
+    def test_msgpack_on_request(self, titles, guest_client, params, headers):
+        response = guest_client.get('/api/v1/titles/', params, **headers)
+        assert response['Content-Type'] == 'application/msgpack'
+        data = msgpack.unpackb(response.content, raw=False)
+        expected = json.loads(guest_client.get('/api/v1/titles/').content)
+        assert data['results'] == expected['results']
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    def test_large_responses_are_compressed(self, titles, guest_client):
+        response = guest_client.get(
+            '/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert response['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.content))['count'] == TITLES
+
+    def test_small_responses_are_not(self, category, guest_client, settings):
+        settings.GZIP_MIN_LENGTH = 10000
+        response = guest_client.get(
+            '/api/v1/categories/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert not response.has_header('Content-Encoding')
+
+
+@pytest.mark.django_db
+class TestMaxLimit:
+
+    def test_limit_is_capped(self, titles, guest_client, settings):
+        settings.PAGE_MAX_LIMIT = 2
+        response = guest_client.get('/api/v1/titles/', {'limit': 1000000})
+        assert len(response.data['results']) == 2
+        assert 'limit=2' in response.data['next']
+
+    def test_cursor_page_is_capped(self, title, guest_client, settings,
+                                   django_user_model):
+        settings.PAGE_MAX_LIMIT = 2
+        for i in range(3):
+            author = django_user_model.objects.create(
+                username=f'author{i}', email=f'a{i}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=5
+            )
+        response = guest_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            {'cursor': '', 'limit': 1000000},
+        )
+        assert len(response.data['results']) == 2
+        assert response.data['next']
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+from api.cache import get_or_compute
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Genre, OutboxEmail, Review
+
+
+def count_queries(client, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, data)
+    assert response.status_code == 200, response.data
+    return len(context.captured_queries), response
+
+
+@pytest.fixture
+def lagging_replica(settings):
+    """Реплика, которая видит базу такой, какой она была до записи."""
+    if connection.vendor != 'postgresql':
+        pytest.skip('Снимок данных реплики строится на PostgreSQL.')
+    connections.databases['replica1'] = dict(connections.databases['default'])
+    replica = connections['replica1']
+    with replica.cursor() as cursor:
+        cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SELECT count(*) FROM reviews_genre')
+    settings.DATABASE_REPLICAS = ['replica1']
+    yield replica
+    with replica.cursor() as cursor:
+        cursor.execute('ROLLBACK')
+    replica.close()
+    del connections['replica1']
+    del connections.databases['replica1']
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_repeated_request_is_served_from_cache(self, title, guest_client):
+        first, _ = count_queries(guest_client, '/api/v1/titles/')
+        second, _ = count_queries(guest_client, '/api/v1/titles/')
+        assert first > 0
+        assert second == 0
+
+    def test_query_string_is_normalized(self, title, guest_client):
+        count_queries(guest_client, '/api/v1/titles/?year=1994&limit=5')
+        queries, _ = count_queries(
+            guest_client, '/api/v1/titles/?limit=5&year=1994'
+        )
+        assert queries == 0
+
+    def test_write_invalidates_dependent_resources(
+        self, title, genres, guest_client, user_client
+    ):
+        count_queries(guest_client, '/api/v1/titles/')
+        count_queries(guest_client, '/api/v1/genres/')
+
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+
+        for url in ('/api/v1/titles/', '/api/v1/genres/'):
+            queries, response = count_queries(guest_client, url)
+            assert queries > 0
+            assert 'Трагедия' in str(response.data)
+
+        user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'Ок', 'score': 7}
+        )
+        assert Review.objects.count() == 1
+        _, response = count_queries(guest_client, f'/api/v1/titles/{title.pk}/')
+        assert response.data['rating'] == 7
+
+    def test_representations_are_cached_separately(self, title, guest_client):
+        url = '/api/v1/titles/'
+        msgpack = guest_client.get(url, HTTP_ACCEPT='application/msgpack')
+        response = guest_client.get(url)
+        assert response['Content-Type'] == 'application/json'
+        assert response['ETag'] != msgpack['ETag']
+        conditional = guest_client.get(
+            url, HTTP_IF_NONE_MATCH=msgpack['ETag']
+        )
+        assert conditional.status_code == 200
+        assert conditional['ETag'] == response['ETag']
+
+    def test_writer_reads_own_write_after_replica_read(
+        self, lagging_replica, admin_client, guest_client
+    ):
+        url = '/api/v1/genres/'
+        response = admin_client.post(url, {'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == 201
+
+        guest_client.get(url)
+        response = admin_client.get(url)
+        assert [genre['slug'] for genre in response.data['results']] == [
+            'drama'
+        ]
+
+    def test_expanded_reviews_follow_comments(
+        self, title, user, user_client, guest_client
+    ):
+        review = Review.objects.create(
+            title=title, author=user, text='Текст', score=5
+        )
+        url = f'/api/v1/titles/{title.pk}/?expand=reviews'
+        _, response = count_queries(guest_client, url)
+        assert response.data['reviews'][0]['comments_count'] == 0
+
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+            {'text': 'Да'},
+        )
+        assert response.status_code == 201
+
+        _, response = count_queries(guest_client, url)
+        assert response.data['reviews'][0]['comments_count'] == 1
+
+    def test_unrelated_models_keep_fast_delete(
+        self, django_assert_num_queries
+    ):
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(subject='Код', body='1234', recipient=f'{i}@y.fake')
+            for i in range(3)
+        )
+        with django_assert_num_queries(1):
+            OutboxEmail.objects.all().delete()
+
+
+class TestSingleFlight:
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value', True
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('test:single-flight', compute, 60)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['value'] * 5
+        assert len(calls) == 1
@@ -0,0 +1,64 @@
+import pytest
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+from reviews.models import Comment, Review, Title
+
+VIEWSETS = (TitleViewSet, ReviewViewSet, CommentViewSet)
+
+
+@pytest.fixture
+def catalog(title, user, another_user, admin):
+    Title.objects.create(name='Без категории', year=2001, description=None)
+    Title.objects.create(name='С описанием', year=2002, description='Текст')
+    for author, score in ((user, 10), (another_user, 3)):
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+        Title.objects.filter(pk=title.pk).add_score(score, 1)
+        for comment_author in (user, admin):
+            Comment.objects.create(
+                review=review, author=comment_author, text='Комментарий'
+            )
+        Review.objects.filter(pk=review.pk).add_comments(2)
+    return title, review
+
+
+def urls(title, review):
+    reviews = f'/api/v1/titles/{title.pk}/reviews/'
+    comments = f'{reviews}{review.pk}/comments/'
+    return [
+        ('/api/v1/titles/', {}),
+        ('/api/v1/titles/', {'ordering': '-reviews_count', 'limit': 2}),
+        ('/api/v1/titles/', {'genre': 'drama'}),
+        ('/api/v1/titles/', {'name': 'побег'}),
+        ('/api/v1/titles/', {'fields': 'id,name,rating'}),
+        (reviews, {}),
+        (reviews, {'ordering': '-score', 'offset': 1}),
+        (reviews, {'cursor': '', 'limit': 1}),
+        (reviews, {'fields': 'author,comments_count'}),
+        (comments, {}),
+        (comments, {'cursor': ''}),
+    ]
+
+
+@pytest.mark.django_db
+class TestRowSerializers:
+
+    @pytest.mark.usefixtures('no_response_cache')
+    def test_output_matches_model_serializers(
+        self, catalog, guest_client, monkeypatch
+    ):
+        for url, params in urls(*catalog):
+            fast = guest_client.get(url, params)
+            with monkeypatch.context() as patch:
+                for viewset in VIEWSETS:
+                    patch.setattr(viewset, 'row_serializer_class', None)
+                slow = guest_client.get(url, params)
+            assert fast.status_code == slow.status_code == 200
+            assert fast.content == slow.content, (url, params)
+
+    def test_expand_uses_model_serializers(self, catalog, guest_client):
+        title, _ = catalog
+        response = guest_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/', {'expand': 'comments'}
+        )
+        assert len(response.data['results'][0]['comments']) == 2
@@ -0,0 +1,36 @@
+import pytest
+from api.search import BasicSearch, search
+from reviews.models import Genre, Title
+
+
+@pytest.fixture
+def shows(category):
+    for name in ('Большое шоу', 'Шоу', 'Шоу двойников', 'Новости'):
+        Title.objects.create(name=name, year=2000, category=category)
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_title_search_is_ranked(self, shows, guest_client):
+        response = guest_client.get('/api/v1/titles/', {'name': 'шоу'})
+        assert response.status_code == 200
+        names = [item['name'] for item in response.data['results']]
+        assert sorted(names) == ['Большое шоу', 'Шоу', 'Шоу двойников']
+        assert names[0] == 'Шоу'
+
+    def test_short_query_falls_back_to_substring(self, shows):
+        names = search(Title.objects.all(), 'name', 'Но')
+        assert [title.name for title in names] == ['Новости']
+
+    def test_catalog_search_filter(self, genres, guest_client):
+        Genre.objects.create(name='Трагикомедия', slug='tragicomedy')
+        response = guest_client.get('/api/v1/genres/', {'search': 'комед'})
+        assert response.status_code == 200
+        assert [item['slug'] for item in response.data['results']] == [
+            'comedy', 'tragicomedy'
+        ]
+
+    def test_basic_search_ranks_by_position(self, shows):
+        names = BasicSearch().search(Title.objects.all(), 'name', 'Шоу')
+        assert [title.name for title in names][:2] == ['Шоу', 'Шоу двойников']
@@ -0,0 +1,84 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.management.commands.seed_data import allocate
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+
+SIZES = {
+    'users': 30, 'categories': 3, 'genres': 5, 'titles': 40,
+    'reviews': 400, 'comments': 600,
+}
+
+
+def seed(**options):
+    out = StringIO()
+    call_command('seed_data', batch_size=64, stdout=out, **SIZES, **options)
+    return out.getvalue()
+
+
+def snapshot():
+    return (
+        list(Title.objects.order_by('pk').values_list(
+            'pk', 'name', 'year', 'category', 'score_sum', 'review_count'
+        )),
+        list(Title.genre.through.objects.order_by('pk').values_list(
+            'title', 'genre'
+        )),
+        list(Review.objects.order_by('pk').values_list(
+            'pk', 'author', 'title', 'text', 'score', 'comments_count'
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'author', 'review', 'text'
+        )),
+    )
+
+
+def test_allocate_respects_cap():
+    counts = allocate(100, [8, 4, 2, 1], cap=40)
+    assert counts == [40, 35, 17, 8]
+    assert allocate(3, [1, 1, 1, 1]) == [1, 1, 1, 0]
+
+
+@pytest.mark.django_db
+class TestSeedData:
+
+    def test_generates_consistent_data(self):
+        out = seed()
+
+        assert CustomUser.objects.count() == SIZES['users']
+        assert Genre.objects.count() == SIZES['genres']
+        assert Title.objects.count() == SIZES['titles']
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        assert not Title.objects.stale_scores().exists()
+        assert not Review.objects.stale_comments().exists()
+        assert 'строк/с' in out
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True,
+        )
+        assert counts[0] <= SIZES['users']
+        assert counts[0] > 3 * counts[len(counts) // 2], 'Популярность скошена'
+        user = CustomUser.objects.create(username='new', email='n@n.fake')
+        assert user.pk == SIZES['users'] + 1
+
+    def test_same_seed_same_data(self):
+        seed()
+        first = snapshot()
+        for model in (Comment, Review, Title, Genre, Category, CustomUser):
+            model.objects.all().delete()
+        seed(no_copy=True)
+        assert snapshot() == first
+        Comment.objects.all().delete()
+        seed(seed=7)
+        assert snapshot()[3][-SIZES['comments']:] != first[3]
+
+    def test_appends_to_existing_data(self, title, user):
+        seed()
+        assert Title.objects.count() == SIZES['titles'] + 1
+        assert Review.objects.filter(title=title).count() == 0
+
+    def test_too_many_reviews(self):
+        with pytest.raises(CommandError):
+            call_command('seed_data', users=2, titles=3, reviews=7)
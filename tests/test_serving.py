@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+import os
+import runpy
+
+import pytest
+from django.conf import settings
+
+CONFIG = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+
+
+def load_config(monkeypatch, **env):
+    for name in ('SERVER_MODE', 'GUNICORN_WORKERS', 'GUNICORN_THREADS',
+                 'CACHE_BACKEND'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONFIG)
+
+
+class TestGunicornConfig:
+
+    def test_defaults_to_threaded_workers(self, monkeypatch):
+        config = load_config(monkeypatch, CACHE_BACKEND='memcached')
+        assert config['worker_class'] == 'gthread'
+        assert config['wsgi_app'] == 'api_yamdb.wsgi:application'
+        assert config['workers'] == multiprocessing.cpu_count() * 2 + 1
+        assert config['threads'] > 1
+        assert config['preload_app']
+        assert config['max_requests'] > 0
+        assert config['max_requests_jitter'] > 0
+
+    def test_single_worker_with_process_local_cache(self, monkeypatch):
+        assert load_config(monkeypatch)['workers'] == 1
+
+    def test_workers_require_shared_cache(self, monkeypatch):
+        for backend in ('locmem', 'file'):
+            with pytest.raises(RuntimeError):
+                load_config(
+                    monkeypatch, GUNICORN_WORKERS='4', CACHE_BACKEND=backend
+                )
+        assert load_config(monkeypatch, CACHE_BACKEND='file')['workers'] == 1
+        config = load_config(
+            monkeypatch, GUNICORN_WORKERS='4', CACHE_BACKEND='memcached'
+        )
+        assert config['workers'] == 4
+
+    def test_asgi_mode(self, monkeypatch):
+        config = load_config(monkeypatch, SERVER_MODE='asgi')
+        assert config['worker_class'] == 'uvicorn.workers.UvicornWorker'
+        assert config['wsgi_app'] == 'api_yamdb.asgi:application'
+
+    def test_unknown_mode(self, monkeypatch):
+        with pytest.raises(RuntimeError):
+            load_config(monkeypatch, SERVER_MODE='eventlet')
+
+
+def test_asgi_application_serves_concurrent_requests():
+    from api_yamdb.asgi import application
+
+    async def get(path):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        await application({
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+        }, receive, send)
+        return sent[0]['status']
+
+    async def main():
+        return await asyncio.gather(*(get('/redoc/') for _ in range(8)))
+
+    statuses = asyncio.get_event_loop().run_until_complete(main())
+    assert statuses == [200] * 8
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(title, user):
+    review = Review.objects.create(
+        title=title, author=user, text='Длинный текст отзыва', score=7
+    )
+    Title.objects.filter(pk=title.pk).add_score(7, 1)
+    Comment.objects.create(review=review, author=user, text='Комментарий')
+    Review.objects.filter(pk=review.pk).add_comments(1)
+    return review
+
+
+def get(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.data
+    return response, ' '.join(q['sql'] for q in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_titles_select_only_requested_columns(
+        self, review, guest_client
+    ):
+        response, sql = get(
+            guest_client, '/api/v1/titles/', fields='id,name,rating'
+        )
+        title = review.title
+        assert response.data['results'] == [{
+            'id': title.pk, 'name': title.name, 'rating': 7,
+        }]
+        assert '"description"' not in sql
+        assert 'reviews_category' not in sql
+        assert 'reviews_genre' not in sql
+
+    def test_related_fields_are_fetched_on_request(
+        self, review, guest_client
+    ):
+        response, sql = get(
+            guest_client, f'/api/v1/titles/{review.title_id}/',
+            fields='name,category,genre',
+        )
+        assert set(response.data) == {'name', 'category', 'genre'}
+        assert response.data['category']['slug'] == 'movie'
+        assert len(response.data['genre']) == 2
+
+    def test_reviews_with_cursor(self, review, user, guest_client):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response, sql = get(
+            guest_client, url, fields='id,author', cursor='', limit=1
+        )
+        assert response.data['results'] == [
+            {'id': review.pk, 'author': user.username}
+        ]
+        assert '"text"' not in sql
+        assert '"password"' not in sql
+
+    def test_fields_with_expand(self, review, guest_client):
+        response, _ = get(
+            guest_client, f'/api/v1/titles/{review.title_id}/',
+            fields='id', expand='reviews',
+        )
+        assert set(response.data) == {'id', 'reviews'}
+        assert response.data['reviews'][0]['text'] == review.text
+
+    @pytest.mark.parametrize('fields', ['id,secret', 'title'])
+    def test_unknown_fields(self, review, guest_client, fields):
+        response = guest_client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/', {'fields': fields}
+        )
+        assert response.status_code == 400
+        assert 'fields' in response.data
@@ -0,0 +1,55 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def library(category, genres, title):
+    drama, comedy = genres
+    book = Category.objects.create(name='Книга', slug='book')
+    satire = Genre.objects.create(name='Сатира', slug='satire')
+    only_comedy = Title.objects.create(name='Комедия', year=2000)
+    only_comedy.genre.set([comedy])
+    novel = Title.objects.create(name='Роман', year=2000, category=book)
+    novel.genre.set([drama, satire])
+    return title, only_comedy, novel
+
+
+def names(client, **params):
+    response = client.get('/api/v1/titles/', params)
+    assert response.status_code == 200, response.data
+    return sorted(item['name'] for item in response.data['results'])
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def test_genre_any_of_returns_distinct_titles(self, library, guest_client):
+        assert names(guest_client, genre='drama,comedy') == [
+            'Комедия', 'Побег из Шоушенка', 'Роман'
+        ]
+
+    def test_genre_all_of(self, library, guest_client):
+        assert names(guest_client, genre_all='drama,comedy') == [
+            'Побег из Шоушенка'
+        ]
+        assert names(guest_client, genre_all='drama') == [
+            'Побег из Шоушенка', 'Роман'
+        ]
+
+    def test_slug_match_is_exact(self, library, guest_client):
+        assert names(guest_client, genre='dram') == []
+        assert names(guest_client, category='mov') == []
+        assert names(guest_client, category='movie,book') == [
+            'Побег из Шоушенка', 'Роман'
+        ]
+
+    def test_fuzzy_opt_in(self, library, guest_client):
+        assert names(guest_client, genre='dram', fuzzy='true') == [
+            'Побег из Шоушенка', 'Роман'
+        ]
+        assert names(guest_client, genre_all='dram,sat', fuzzy='true') == [
+            'Роман'
+        ]
+        assert names(guest_client, category='mov', fuzzy='true') == [
+            'Побег из Шоушенка'
+        ]